@@ -3,62 +3,151 @@
 
 import sys
 import struct
+import operator
+import queue
+from array import array
+from typing import NamedTuple
 from lexer import TokenType, Lexer
 
-# AST节点定义
+# AST节点定义（使用__slots__去掉每个实例的__dict__）
 class ASTNode:
-    pass
+    __slots__ = ()
 
 class Program(ASTNode):
+    __slots__ = ('statements',)
+    
     def __init__(self, statements):
         self.statements = statements
 
 class StatementList(ASTNode):
+    __slots__ = ('statements',)
+    
     def __init__(self, statements):
         self.statements = statements
 
 class AssignmentStatement(ASTNode):
+    __slots__ = ('lvalue', 'expression')
+    
     def __init__(self, lvalue, expression):
         self.lvalue = lvalue
         self.expression = expression
 
 class IfStatement(ASTNode):
+    __slots__ = ('condition', 'then_statements', 'else_statements')
+    
     def __init__(self, condition, then_statements, else_statements=None):
         self.condition = condition
         self.then_statements = then_statements
         self.else_statements = else_statements
 
 class WhileStatement(ASTNode):
+    __slots__ = ('condition', 'body_statements')
+    
     def __init__(self, condition, body_statements):
         self.condition = condition
         self.body_statements = body_statements
 
-class BinaryOp(ASTNode):
-    def __init__(self, left, operator, right):
-        self.left = left
-        self.operator = operator
-        self.right = right
+# 表达式节点创建后不再修改，用NamedTuple表示：构造只需一次元组分配，字段按下标存取
+class BinaryOp(NamedTuple):
+    left: object
+    operator: str
+    right: object
+
+class Identifier(NamedTuple):
+    name: str
+
+class Literal(NamedTuple):
+    value: int
 
-class Identifier(ASTNode):
-    def __init__(self, name):
-        self.name = name
+class SpecialVar(NamedTuple):
+    name: str
 
-class Literal(ASTNode):
-    def __init__(self, value):
-        self.value = value
+# 可作为赋值左值的输出关键字，以及可出现在表达式中的关键字
+_OUTPUT_VARS = frozenset(("write", "put"))
+_EXPRESSION_KEYWORDS = frozenset(("read", "write", "put", "get"))
 
-class SpecialVar(ASTNode):
-    def __init__(self, name):
-        self.name = name
+# 二元运算符优先级（数值越大结合越紧）
+_PRECEDENCE = {
+    "==": 1, "!=": 1,
+    ">": 2, "<": 2, ">=": 2, "<=": 2,
+    "+": 3, "-": 3,
+    "*": 4, "/": 4, "%": 4,
+}
+
+def to_32bit_int(value):
+    """将值转换为32位有符号整数（与虚拟机的截断规则一致）"""
+    if -2147483648 <= value <= 2147483647:
+        return value
+    return ((value + 2147483648) % 4294967296) - 2147483648
+
+# 常量折叠的求值规则，必须与虚拟机eval指令的行为一致：
+# 加法和乘法保留完整精度，减、除、模的结果截断为32位，比较结果为0或1
+_FOLD = {
+    "+": operator.add,
+    "-": lambda a, b: to_32bit_int(a - b),
+    "*": operator.mul,
+    "/": lambda a, b: to_32bit_int(a // b),
+    "%": lambda a, b: to_32bit_int(a % b),
+    ">": lambda a, b: 1 if a > b else 0,
+    "<": lambda a, b: 1 if a < b else 0,
+    ">=": lambda a, b: 1 if a >= b else 0,
+    "<=": lambda a, b: 1 if a <= b else 0,
+    "==": lambda a, b: 1 if a == b else 0,
+    "!=": lambda a, b: 1 if a != b else 0,
+}
+
+def fold_binary(left, op, right):
+    """构造二元运算节点，两侧都是常量时直接折叠为常量"""
+    if isinstance(left, Literal) and isinstance(right, Literal):
+        # 除零留到运行时报错；超出32位的常量不折叠，仍由代码生成时报告范围错误
+        if (0 <= left.value <= 0xFFFFFFFF and 0 <= right.value <= 0xFFFFFFFF
+                and not (right.value == 0 and op in ("/", "%"))):
+            value = _FOLD[op](left.value, right.value)
+            # 只有一条DSTORE能原样压栈的值才折叠
+            if 0 <= value <= 0xFFFFFFFF:
+                return Literal(value)
+    return BinaryOp(left, op, right)
 
 # 修改的Parser类，生成AST
 class ASTParser:
+    _pool = queue.LifoQueue()  # 空闲解析器对象池
+    
     def __init__(self, lexer):
+        self.reset(lexer)
+    
+    def reset(self, lexer):
+        """绑定新的词法分析器，一次性取出全部Token后从头开始解析"""
         self.lexer = lexer
-        self.current_token = self.lexer.get_next_token()
+        tokens = []
+        token = lexer.get_next_token()
+        while token is not None:
+            tokens.append(token)
+            token = lexer.get_next_token()
+        tokens.append(None)  # 结束哨兵，对应输入结束
+        self.tokens = tokens
+        self.pos = 0
+        self.current_token = tokens[0]
+    
+    @classmethod
+    def acquire(cls, lexer):
+        """从对象池取出一个解析器，池空时新建"""
+        try:
+            parser = cls._pool.get_nowait()
+        except queue.Empty:
+            return cls(lexer)
+        parser.reset(lexer)
+        return parser
+    
+    @classmethod
+    def release(cls, parser):
+        """解析器用完后放回对象池"""
+        parser.lexer = None
+        parser.tokens = None
+        parser.current_token = None
+        cls._pool.put(parser)
     
     def error(self, message="Syntax error"):
-        token_info = "EOF" if self.current_token is None else "{}:{}".format(self.current_token.type, self.current_token.value)
+        token_info = "EOF" if self.current_token is None else "{}:{}".format(self.current_token[0], self.current_token[1])
         raise Exception("{} at {}".format(message, token_info))
     
     def eat(self, token_type, token_value=None):
@@ -66,16 +155,22 @@ class ASTParser:
         if self.current_token is None:
             self.error("Expected {}{}".format(token_type, ":{}".format(token_value) if token_value else ""))
             
-        if self.current_token.type == token_type:
-            if token_value is None or self.current_token.value == token_value:
+        if self.current_token[0] == token_type:
+            if token_value is None or self.current_token[1] == token_value:
                 token = self.current_token
-                self.current_token = self.lexer.get_next_token()
+                self.pos += 1
+                self.current_token = self.tokens[self.pos]
                 return token
             else:
                 self.error("Expected {}:{}".format(token_type, token_value))
         else:
             self.error("Expected {}{}".format(token_type, ":{}".format(token_value) if token_value else ""))
     
+    def advance(self):
+        """跳过调用方已经检查过类型和值的当前Token，省去eat中的重复比较"""
+        self.pos += 1
+        self.current_token = self.tokens[self.pos]
+    
     def program(self):
         """解析整个程序"""
         statements = self.statement_list()
@@ -84,43 +179,49 @@ class ASTParser:
     def statement_list(self):
         """解析语句列表"""
         statements = []
+        append = statements.append  # 绑定到局部变量，循环中不再重复查找方法
         
         # 处理空程序
-        if self.current_token is None:
+        tok = self.current_token
+        if tok is None:
             return statements
         
         # 处理至少一条语句
-        if self.current_token.type != TokenType.OP or self.current_token.value != '}':
-            statements.append(self.statement())
+        if tok[0] != TokenType.OP or tok[1] != '}':
+            append(self.statement())
         
         # 处理多条语句
-        while self.current_token is not None and self.current_token.type != TokenType.OP and self.current_token.value != '}':
-            statements.append(self.statement())
+        while True:
+            tok = self.current_token
+            if tok is None or tok[0] == TokenType.OP or tok[1] == '}':
+                break
+            append(self.statement())
         
         return statements
     
-    def statement(self):
+    def statement(self, _KEYWORD=TokenType.KEYWORD, _ID=TokenType.ID):
         """解析单条语句"""
-        if self.current_token is None:
+        tok = self.current_token
+        if tok is None:
             self.error("Unexpected end of input")
             
-        if self.current_token.type == TokenType.KEYWORD:
-            if self.current_token.value == "if":
+        if tok[0] == _KEYWORD:
+            if tok[1] == "if":
                 return self.if_statement()
-            elif self.current_token.value == "while":
+            elif tok[1] == "while":
                 return self.while_statement()
-            elif self.current_token.value in ["write", "put"]:
+            elif tok[1] in _OUTPUT_VARS:
                 return self.assignment_statement()
             else:
-                self.error("Unexpected keyword: {}".format(self.current_token.value))
-        elif self.current_token.type == TokenType.ID:
+                self.error("Unexpected keyword: {}".format(tok[1]))
+        elif tok[0] == _ID:
             return self.assignment_statement()
         else:
-            self.error("Unexpected token: {}:{}".format(self.current_token.type, self.current_token.value))
+            self.error("Unexpected token: {}:{}".format(tok[0], tok[1]))
     
     def if_statement(self):
         """解析if语句"""
-        self.eat(TokenType.KEYWORD, "if")
+        self.advance()
         self.eat(TokenType.OP, "(")
         condition = self.expression()
         self.eat(TokenType.OP, ")")
@@ -130,8 +231,8 @@ class ASTParser:
         
         else_statements = None
         # else部分是可选的
-        if self.current_token is not None and self.current_token.type == TokenType.KEYWORD and self.current_token.value == "else":
-            self.eat(TokenType.KEYWORD, "else")
+        if self.current_token is not None and self.current_token[0] == TokenType.KEYWORD and self.current_token[1] == "else":
+            self.advance()
             self.eat(TokenType.OP, "{")
             else_statements = self.statement_list()
             self.eat(TokenType.OP, "}")
@@ -140,7 +241,7 @@ class ASTParser:
     
     def while_statement(self):
         """解析while语句"""
-        self.eat(TokenType.KEYWORD, "while")
+        self.advance()
         self.eat(TokenType.OP, "(")
         condition = self.expression()
         self.eat(TokenType.OP, ")")
@@ -153,12 +254,12 @@ class ASTParser:
     def assignment_statement(self):
         """解析赋值语句"""
         # 左值可以是标识符或特殊关键字(write, put)
-        if self.current_token.type == TokenType.ID:
-            lvalue = Identifier(self.current_token.value)
-            self.eat(TokenType.ID)
-        elif self.current_token.type == TokenType.KEYWORD and self.current_token.value in ["write", "put"]:
-            lvalue = SpecialVar(self.current_token.value)
-            self.eat(TokenType.KEYWORD)
+        if self.current_token[0] == TokenType.ID:
+            lvalue = Identifier(self.current_token[1])
+            self.advance()
+        elif self.current_token[0] == TokenType.KEYWORD and self.current_token[1] in _OUTPUT_VARS:
+            lvalue = SpecialVar(self.current_token[1])
+            self.advance()
         else:
             self.error("Expected identifier or output variable")
             
@@ -170,82 +271,45 @@ class ASTParser:
     
     def expression(self):
         """解析表达式"""
-        return self.equality()
+        return self.binary_expression(1)
     
-    def equality(self):
-        """解析相等性表达式"""
-        left = self.comparison()
-        
-        while (self.current_token is not None and 
-               self.current_token.type == TokenType.OP and 
-               self.current_token.value in ["==", "!="]):
-            op = self.current_token.value
-            self.eat(TokenType.OP, op)
-            right = self.comparison()
-            left = BinaryOp(left, op, right)
-        
-        return left
-    
-    def comparison(self):
-        """解析比较表达式"""
-        left = self.term()
-        
-        while (self.current_token is not None and 
-               self.current_token.type == TokenType.OP and 
-               self.current_token.value in [">", "<", ">=", "<="]):
-            op = self.current_token.value
-            self.eat(TokenType.OP, op)
-            right = self.term()
-            left = BinaryOp(left, op, right)
-        
-        return left
-    
-    def term(self):
-        """解析加减表达式"""
-        left = self.factor()
-        
-        while (self.current_token is not None and 
-               self.current_token.type == TokenType.OP and 
-               self.current_token.value in ["+", "-"]):
-            op = self.current_token.value
-            self.eat(TokenType.OP, op)
-            right = self.factor()
-            left = BinaryOp(left, op, right)
-        
-        return left
-    
-    def factor(self):
-        """解析乘除模表达式"""
+    # 热点方法用默认参数把常量绑定为局部变量（LOAD_FAST代替逐次的属性/全局查找）
+    def binary_expression(self, min_prec, _OP=TokenType.OP, _PRECEDENCE=_PRECEDENCE, _fold=fold_binary):
+        """按优先级爬升解析左结合的二元运算表达式"""
         left = self.primary()
         
-        while (self.current_token is not None and 
-               self.current_token.type == TokenType.OP and 
-               self.current_token.value in ["*", "/", "%"]):
-            op = self.current_token.value
-            self.eat(TokenType.OP, op)
-            right = self.primary()
-            left = BinaryOp(left, op, right)
+        while True:
+            tok = self.current_token
+            if tok is None or tok[0] != _OP:
+                break
+            prec = _PRECEDENCE.get(tok[1])
+            if prec is None or prec < min_prec:
+                break
+            op = tok[1]
+            self.advance()
+            right = self.binary_expression(prec + 1)
+            left = _fold(left, op, right)
         
         return left
     
-    def primary(self):
+    def primary(self, _LITERAL=TokenType.LITERAL, _ID=TokenType.ID, _KEYWORD=TokenType.KEYWORD, _OP=TokenType.OP):
         """解析基本表达式"""
-        if self.current_token.type == TokenType.LITERAL:
-            value = self.current_token.value
-            self.eat(TokenType.LITERAL)
+        tok = self.current_token
+        if tok[0] == _LITERAL:
+            # 词法分析器以十六进制字符串给出常量，建树时一次性转换为整数
+            value = int(tok[1], 16)
+            self.advance()
             return Literal(value)
-        elif self.current_token.type == TokenType.ID:
-            name = self.current_token.value
-            self.eat(TokenType.ID)
-            return Identifier(name)
-        elif self.current_token.type == TokenType.KEYWORD and self.current_token.value in ["read", "write", "put", "get"]:
-            name = self.current_token.value
-            self.eat(TokenType.KEYWORD)
-            return SpecialVar(name)
-        elif self.current_token.type == TokenType.OP and self.current_token.value == "(":
-            self.eat(TokenType.OP, "(")
+        elif tok[0] == _ID:
+            self.advance()
+            return Identifier(tok[1])
+        elif tok[0] == _KEYWORD and tok[1] in _EXPRESSION_KEYWORDS:
+            self.advance()
+            return SpecialVar(tok[1])
+        elif tok[0] == _OP and tok[1] == "(":
+            self.advance()
             expr = self.expression()
-            self.eat(TokenType.OP, ")")
+            self.eat(_OP, ")")
             return expr
         else:
             self.error("Invalid primary expression")
@@ -261,13 +325,28 @@ class ASTParser:
         except Exception as e:
             raise e
 
+# 32位无符号整数的array类型码
+WORD = "I" if array("I").itemsize == 4 else "L"
+
 # 代码生成器
 class CodeGenerator:
     def __init__(self):
-        self.instructions = []  # 指令列表
+        self.instructions = array(WORD)  # 指令序列：操作码与操作数交替存放
         self.var_table = {}     # 变量符号表
         self.var_count = 0      # 变量计数器
-        self.label_count = 0    # 标签计数器
+        self._work = []         # 语句生成的工作栈
+        
+        # 按节点类型预先建立访问方法分发表，避免每次访问都拼接方法名再getattr
+        self._dispatch = {
+            Program: self.visit_Program,
+            AssignmentStatement: self.visit_AssignmentStatement,
+            IfStatement: self.visit_IfStatement,
+            WhileStatement: self.visit_WhileStatement,
+            BinaryOp: self.visit_BinaryOp,
+            Identifier: self.visit_Identifier,
+            Literal: self.visit_Literal,
+            SpecialVar: self.visit_SpecialVar,
+        }
     
     # 指令操作码
     NOP = 0x00000000
@@ -295,27 +374,65 @@ class CodeGenerator:
     OP_NE = 0x0001000B
     OP_COND_JUMP = 0x0001000C
     
+    _pool = queue.LifoQueue()  # 空闲代码生成器对象池
+    
+    # 二元运算符到eval操作数的映射
+    OP_MAP = {
+        "+": OP_ADD,
+        "-": OP_SUB,
+        "*": OP_MUL,
+        "/": OP_DIV,
+        "%": OP_MOD,
+        ">": OP_GT,
+        "<": OP_LT,
+        ">=": OP_GE,
+        "<=": OP_LE,
+        "==": OP_EQ,
+        "!=": OP_NE
+    }
+    
+    def reset(self):
+        """清空上一次编译的状态，保留已分配的容器和分发表"""
+        del self.instructions[:]
+        self.var_table.clear()
+        self.var_count = 0
+        self._work.clear()
+    
+    @classmethod
+    def acquire(cls):
+        """从对象池取出一个代码生成器，池空时新建"""
+        try:
+            return cls._pool.get_nowait()
+        except queue.Empty:
+            return cls()
+    
+    @classmethod
+    def release(cls, generator):
+        """重置代码生成器并放回对象池；此后generate返回的指令序列失效"""
+        generator.reset()
+        cls._pool.put(generator)
+    
     def get_var_id(self, name):
         """获取变量ID，如果不存在则创建"""
-        if name not in self.var_table:
-            self.var_table[name] = self.var_count
+        var_id = self.var_table.get(name)
+        if var_id is None:
+            var_id = self.var_count
+            self.var_table[name] = var_id
             self.var_count += 1
-        return self.var_table[name]
+        return var_id
     
     def emit(self, opcode, operand=0):
         """发射一条指令"""
-        self.instructions.append((opcode, operand))
+        self.instructions.append(opcode)
+        self.instructions.append(operand)
     
-    def get_label(self):
-        """获取新标签"""
-        label = f"L{self.label_count}"
-        self.label_count += 1
-        return label
+    def next_index(self):
+        """下一条指令的序号"""
+        return len(self.instructions) >> 1
     
     def patch_jump(self, instruction_index, target_address):
         """修补跳转地址"""
-        opcode, _ = self.instructions[instruction_index]
-        self.instructions[instruction_index] = (opcode, target_address)
+        self.instructions[2 * instruction_index + 1] = target_address
     
     def generate(self, ast):
         """生成代码"""
@@ -326,9 +443,7 @@ class CodeGenerator:
     
     def visit(self, node):
         """访问AST节点"""
-        method_name = f"visit_{type(node).__name__}"
-        method = getattr(self, method_name, self.generic_visit)
-        return method(node)
+        return self._dispatch.get(type(node), self.generic_visit)(node)
     
     def generic_visit(self, node):
         """通用访问方法"""
@@ -336,8 +451,22 @@ class CodeGenerator:
     
     def visit_Program(self, node):
         """访问程序节点"""
-        for stmt in node.statements:
-            self.visit(stmt)
+        # 语句用显式工作栈驱动，嵌套的if/while不再消耗Python调用栈；
+        # 栈中元素是待访问的语句节点，或语句序列结束后要执行的收尾动作
+        work = self._work
+        work.extend(reversed(node.statements))
+        while work:
+            item = work.pop()
+            if isinstance(item, ASTNode):
+                self.visit(item)
+            else:
+                item()
+    
+    def schedule(self, statements, on_finish):
+        """安排一段语句序列，全部生成后再执行on_finish"""
+        work = self._work
+        work.append(on_finish)
+        work.extend(reversed(statements))
     
     def visit_AssignmentStatement(self, node):
         """访问赋值语句"""
@@ -361,81 +490,57 @@ class CodeGenerator:
         # 生成条件表达式代码（结果在栈顶）
         self.visit(node.condition)
         
+        # 压入then和else分支地址；then分支紧跟在这三条指令之后，地址可以直接算出
+        then_addr = (self.next_index() + 3) * 8
+        self.emit(self.DSTORE, then_addr)  # then分支地址
+        else_addr_pos = self.next_index()
+        self.emit(self.DSTORE, 0)  # else分支地址，稍后修补
+        self.emit(self.EVAL, self.OP_COND_JUMP)
+        
         if node.else_statements:
             # 有else分支的情况
-            # 压入then和else分支地址
-            then_addr_pos = len(self.instructions)
-            self.emit(self.DSTORE, 0)  # then分支地址，稍后修补
-            else_addr_pos = len(self.instructions) 
-            self.emit(self.DSTORE, 0)  # else分支地址，稍后修补
-            self.emit(self.EVAL, self.OP_COND_JUMP)
-            
-            # then分支代码
-            then_start = len(self.instructions)
-            for stmt in node.then_statements:
-                self.visit(stmt)
-            
-            # 跳转到if语句结束
-            jump_to_end = len(self.instructions)
-            self.emit(self.JUMP, 0)  # 稍后修补
-            
-            # else分支代码
-            else_start = len(self.instructions)
-            for stmt in node.else_statements:
-                self.visit(stmt)
-            
-            # 修补跳转地址
-            end_addr = len(self.instructions) * 8
-            self.patch_jump(jump_to_end, end_addr)
-            self.patch_jump(then_addr_pos, then_start * 8)   # then分支地址
-            self.patch_jump(else_addr_pos, else_start * 8)   # else分支地址
+            def after_then():
+                # 跳转到if语句结束
+                jump_to_end = self.next_index()
+                self.emit(self.JUMP, 0)  # 稍后修补
+                
+                # else分支代码
+                self.patch_jump(else_addr_pos, self.next_index() * 8)  # else分支地址
+                
+                def after_else():
+                    self.patch_jump(jump_to_end, self.next_index() * 8)
+                
+                self.schedule(node.else_statements, after_else)
         else:
             # 没有else分支的情况
-            then_addr_pos = len(self.instructions)
-            self.emit(self.DSTORE, 0)  # then分支地址，稍后修补
-            else_addr_pos = len(self.instructions)
-            self.emit(self.DSTORE, 0)  # else分支地址（跳到结束），稍后修补
-            self.emit(self.EVAL, self.OP_COND_JUMP)
-            
-            # then分支代码
-            then_start = len(self.instructions)
-            for stmt in node.then_statements:
-                self.visit(stmt)
-            
-            # 修补跳转地址
-            end_addr = len(self.instructions) * 8
-            self.patch_jump(then_addr_pos, then_start * 8)  # then分支地址
-            self.patch_jump(else_addr_pos, end_addr)        # else分支地址（跳到结束）
+            def after_then():
+                self.patch_jump(else_addr_pos, self.next_index() * 8)  # else分支地址（跳到结束）
+        
+        self.schedule(node.then_statements, after_then)
     
     def visit_WhileStatement(self, node):
         """访问while语句"""
         # 循环开始位置
-        loop_start = len(self.instructions)
+        loop_start = self.next_index()
         
         # 生成条件表达式代码（结果在栈顶）
         self.visit(node.condition)
         
-        # 压入then和else分支地址
-        then_addr_pos = len(self.instructions)
-        self.emit(self.DSTORE, 0)  # body分支地址，稍后修补
-        else_addr_pos = len(self.instructions)
+        # 压入then和else分支地址；循环体紧跟在这三条指令之后，地址可以直接算出
+        body_addr = (self.next_index() + 3) * 8
+        self.emit(self.DSTORE, body_addr)  # body分支地址
+        else_addr_pos = self.next_index()
         self.emit(self.DSTORE, 0)  # end分支地址，稍后修补
         self.emit(self.EVAL, self.OP_COND_JUMP)
         
-        # 循环体代码
-        body_start = len(self.instructions)
-        for stmt in node.body_statements:
-            self.visit(stmt)
+        def after_body():
+            # 跳回循环开始
+            self.emit(self.JUMP, loop_start * 8)
+            self.patch_jump(else_addr_pos, self.next_index() * 8)  # end分支地址
         
-        # 跳回循环开始
-        self.emit(self.JUMP, loop_start * 8)
-        
-        # 修补跳转地址
-        end_addr = len(self.instructions) * 8
-        self.patch_jump(then_addr_pos, body_start * 8)  # body分支地址
-        self.patch_jump(else_addr_pos, end_addr)        # end分支地址
+        self.schedule(node.body_statements, after_body)
     
-    def visit_BinaryOp(self, node):
+    def visit_BinaryOp(self, node, _EVAL=EVAL, _OP_MAP=OP_MAP):
         """访问二元运算"""
         # 计算左操作数
         self.visit(node.left)
@@ -443,24 +548,10 @@ class CodeGenerator:
         self.visit(node.right)
         
         # 生成对应的运算指令
-        op_map = {
-            "+": self.OP_ADD,
-            "-": self.OP_SUB,
-            "*": self.OP_MUL,
-            "/": self.OP_DIV,
-            "%": self.OP_MOD,
-            ">": self.OP_GT,
-            "<": self.OP_LT,
-            ">=": self.OP_GE,
-            "<=": self.OP_LE,
-            "==": self.OP_EQ,
-            "!=": self.OP_NE
-        }
-        
-        if node.operator in op_map:
-            self.emit(self.EVAL, op_map[node.operator])
-        else:
+        operand = _OP_MAP.get(node.operator)
+        if operand is None:
             raise Exception("Unknown operator: {}".format(node.operator))
+        self.emit(_EVAL, operand)
     
     def visit_Identifier(self, node):
         """访问标识符"""
@@ -469,9 +560,7 @@ class CodeGenerator:
     
     def visit_Literal(self, node):
         """访问字面量"""
-        # 将十六进制字符串转换为整数
-        value = int(node.value, 16)
-        self.emit(self.DSTORE, value)
+        self.emit(self.DSTORE, node.value)
     
     def visit_SpecialVar(self, node):
         """访问特殊变量"""
@@ -485,45 +574,27 @@ class CodeGenerator:
 
 # 字节码输出器
 class BytecodeWriter:
+    HEADER = struct.Struct(">16sIII4x")
+    
     def __init__(self):
         pass
     
     def write_bytecode(self, instructions, var_count):
-        """生成字节码文件内容"""
+        """生成字节码文件内容，返回(文件头, 代码区)两段缓冲区"""
         # 计算大小
         data_size = var_count * 4  # 每个变量4字节
-        code_size = len(instructions) * 8  # 每条指令8字节
-        
-        # 构建文件头
-        header = bytearray()
-        # 魔数：MANDRILLBYTECODE (16字节)
-        magic = b"MANDRILLBYTECODE"
-        header.extend(magic)
-        
-        # 版本号 (4字节大端序)
-        version = struct.pack(">I", 1)
-        header.extend(version)
-        
-        # 数据区大小 (4字节大端序)
-        data_size_bytes = struct.pack(">I", data_size)
-        header.extend(data_size_bytes)
-        
-        # 代码区大小 (4字节大端序)
-        code_size_bytes = struct.pack(">I", code_size)
-        header.extend(code_size_bytes)
+        code_size = len(instructions) * 4  # 每条指令8字节（操作码、操作数各4字节）
         
-        # 填充 (4字节)
-        padding = b"\x00\x00\x00\x00"
-        header.extend(padding)
+        # 构建文件头：魔数MANDRILLBYTECODE(16字节)、版本号、数据区大小、代码区大小(各4字节大端序)，再加4字节填充
+        header = self.HEADER.pack(b"MANDRILLBYTECODE", 1, data_size, code_size)
         
-        # 构建指令序列
-        code = bytearray()
-        for opcode, operand in instructions:
-            # 每条指令8字节，前4字节操作码，后4字节操作数，都是大端序
-            instruction = struct.pack(">II", opcode, operand)
-            code.extend(instruction)
+        # 指令序列整体转换为大端序
+        code = array(WORD, instructions)
+        if sys.byteorder == "little":
+            code.byteswap()
         
-        return bytes(header + code)
+        # 分两段返回，由调用方依次写出，省去拼接整个文件的一次复制
+        return header, code
 
 def main():
     # 从标准输入读取源代码
@@ -534,19 +605,21 @@ def main():
         lexer = Lexer(source)
         
         # 语法分析，生成AST
-        parser = ASTParser(lexer)
+        parser = ASTParser.acquire(lexer)
         ast = parser.parse()
+        ASTParser.release(parser)
         
         # 代码生成
-        generator = CodeGenerator()
+        generator = CodeGenerator.acquire()
         instructions = generator.generate(ast)
         
         # 生成字节码
         writer = BytecodeWriter()
-        bytecode = writer.write_bytecode(instructions, generator.var_count)
+        header, code = writer.write_bytecode(instructions, generator.var_count)
+        CodeGenerator.release(generator)
         
         # 输出字节码到标准输出
-        sys.stdout.buffer.write(bytecode)
+        sys.stdout.buffer.writelines((header, code))
         
     except Exception as e:
         print("Compilation error: {}".format(e), file=sys.stderr)
@@ -1,32 +1,60 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import os
+import re
 import sys
+import atexit
+import marshal
+import hashlib
+import operator
+from functools import partial
+import importlib.util
 from lexer import TokenType, Lexer
 
 # AST节点基类
+# 每个具体节点类带一个整数KIND，作为解释器访问方法表的下标
 class ASTNode:
-    pass
+    KIND = 8  # 未知节点，对应generic_visit
 
 # 表达式节点
 class Expression(ASTNode):
     pass
 
 class BinaryOp(Expression):
+    KIND = 4
+    
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
         self.right = right
 
 class Literal(Expression):
+    KIND = 5
+    
     def __init__(self, value):
         self.value = value
 
+# 常用小整数的常量节点只创建一次，各处出现的同值常量共享同一节点（常量节点不会被修改）
+LITERAL_CACHE = {value: Literal(value) for value in range(-5, 257)}
+
+def make_literal(value):
+    """返回值为value的常量节点，小整数复用缓存的节点"""
+    node = LITERAL_CACHE.get(value)
+    if node is None:
+        node = Literal(value)
+    return node
+
 class Identifier(Expression):
+    KIND = 6
+    
     def __init__(self, name):
         self.name = name
+        self.slot = None  # 名字解析后得到的变量槽位
 
 class Keyword(Expression):
+    KIND = 7
+    
     def __init__(self, name):
         self.name = name
 
@@ -35,37 +63,67 @@ class Statement(ASTNode):
     pass
 
 class Assignment(Statement):
+    KIND = 1
+    
     def __init__(self, target, value):
         self.target = target
         self.value = value
 
 class IfStatement(Statement):
+    KIND = 2
+    
     def __init__(self, condition, then_block, else_block=None):
+        # then_block和else_block直接保存语句列表
         self.condition = condition
         self.then_block = then_block
         self.else_block = else_block
+        self.condition_func = None  # 预编译的条件求值函数
 
 class WhileStatement(Statement):
+    KIND = 3
+    
     def __init__(self, condition, body):
+        # body直接保存语句列表
         self.condition = condition
         self.body = body
-
-class Block(Statement):
-    def __init__(self, statements):
-        self.statements = statements
+        self.condition_func = None  # 预编译的条件求值函数
+        # 循环体只有赋值语句时不需要为语句块压栈，可以直接原地循环
+        self.flat = all(statement.KIND == Assignment.KIND for statement in body)
 
 class Program(ASTNode):
+    KIND = 0
+    
     def __init__(self, statements):
         self.statements = statements
 
 # 修改Parser来构建AST
 class ASTParser:
+    # 二元运算符的优先级，数值越大结合越紧
+    _PRECEDENCE = {
+        "==": 1, "!=": 1,
+        ">": 2, "<": 2, ">=": 2, "<=": 2,
+        "+": 3, "-": 3,
+        "*": 4, "/": 4, "%": 4,
+    }
+    # 关键字集合（frozenset成员判断为O(1)哈希查找）
+    _OUTPUT_VARS = frozenset(("write", "put"))
+    _EXPRESSION_KEYWORDS = frozenset(("read", "write", "put", "get"))
+    
     def __init__(self, lexer):
         self.lexer = lexer
-        self.current_token = self.lexer.get_next_token()
+        # 一次性取出全部Token，解析时按下标前进，不再逐个调用词法分析器
+        tokens = []
+        token = lexer.get_next_token()
+        while token is not None:
+            tokens.append(token)
+            token = lexer.get_next_token()
+        tokens.append(None)  # 结束哨兵，对应输入结束
+        self.tokens = tokens
+        self.pos = 0
+        self.current_token = tokens[0]
     
     def error(self, message="Syntax error"):
-        token_info = "EOF" if self.current_token is None else f"{self.current_token.type}:{self.current_token.value}"
+        token_info = "EOF" if self.current_token is None else f"{self.current_token[0]}:{self.current_token[1]}"
         raise Exception(f"{message} at {token_info}")
     
     def eat(self, token_type, token_value=None):
@@ -73,9 +131,10 @@ class ASTParser:
         if self.current_token is None:
             self.error(f"Expected {token_type}" + (f":{token_value}" if token_value else ""))
             
-        if self.current_token.type == token_type:
-            if token_value is None or self.current_token.value == token_value:
-                self.current_token = self.lexer.get_next_token()
+        if self.current_token[0] is token_type:
+            if token_value is None or self.current_token[1] == token_value:
+                self.pos += 1
+                self.current_token = self.tokens[self.pos]
             else:
                 self.error(f"Expected {token_type}:{token_value}")
         else:
@@ -95,7 +154,7 @@ class ASTParser:
             return statements
         
         # 处理语句
-        while self.current_token is not None and not (self.current_token.type == TokenType.OP and self.current_token.value == '}'):
+        while self.current_token is not None and not (self.current_token[0] is TokenType.OP and self.current_token[1] == '}'):
             statements.append(self.statement())
         
         return statements
@@ -105,19 +164,19 @@ class ASTParser:
         if self.current_token is None:
             self.error("Unexpected end of input")
             
-        if self.current_token.type == TokenType.KEYWORD:
-            if self.current_token.value == "if":
+        if self.current_token[0] is TokenType.KEYWORD:
+            if self.current_token[1] == "if":
                 return self.if_statement()
-            elif self.current_token.value == "while":
+            elif self.current_token[1] == "while":
                 return self.while_statement()
-            elif self.current_token.value in ["write", "put"]:
+            elif self.current_token[1] in ASTParser._OUTPUT_VARS:
                 return self.assignment_statement()
             else:
-                self.error(f"Unexpected keyword: {self.current_token.value}")
-        elif self.current_token.type == TokenType.ID:
+                self.error(f"Unexpected keyword: {self.current_token[1]}")
+        elif self.current_token[0] is TokenType.ID:
             return self.assignment_statement()
         else:
-            self.error(f"Unexpected token: {self.current_token.type}:{self.current_token.value}")
+            self.error(f"Unexpected token: {self.current_token[0]}:{self.current_token[1]}")
     
     def if_statement(self):
         """解析if语句"""
@@ -126,15 +185,15 @@ class ASTParser:
         condition = self.expression()
         self.eat(TokenType.OP, ")")
         self.eat(TokenType.OP, "{")
-        then_block = Block(self.statement_list())
+        then_block = self.statement_list()
         self.eat(TokenType.OP, "}")
         
         else_block = None
         # else部分是可选的
-        if self.current_token is not None and self.current_token.type == TokenType.KEYWORD and self.current_token.value == "else":
+        if self.current_token is not None and self.current_token[0] is TokenType.KEYWORD and self.current_token[1] == "else":
             self.eat(TokenType.KEYWORD, "else")
             self.eat(TokenType.OP, "{")
-            else_block = Block(self.statement_list())
+            else_block = self.statement_list()
             self.eat(TokenType.OP, "}")
         
         return IfStatement(condition, then_block, else_block)
@@ -146,7 +205,7 @@ class ASTParser:
         condition = self.expression()
         self.eat(TokenType.OP, ")")
         self.eat(TokenType.OP, "{")
-        body = Block(self.statement_list())
+        body = self.statement_list()
         self.eat(TokenType.OP, "}")
         
         return WhileStatement(condition, body)
@@ -154,11 +213,11 @@ class ASTParser:
     def assignment_statement(self):
         """解析赋值语句"""
         # 左值可以是标识符或特殊关键字(write, put)
-        if self.current_token.type == TokenType.ID:
-            target = Identifier(self.current_token.value)
+        if self.current_token[0] is TokenType.ID:
+            target = Identifier(self.current_token[1])
             self.eat(TokenType.ID)
-        elif self.current_token.type == TokenType.KEYWORD and self.current_token.value in ["write", "put"]:
-            target = Keyword(self.current_token.value)
+        elif self.current_token[0] is TokenType.KEYWORD and self.current_token[1] in ASTParser._OUTPUT_VARS:
+            target = Keyword(self.current_token[1])
             self.eat(TokenType.KEYWORD)
         else:
             self.error("Expected identifier or output variable")
@@ -171,83 +230,47 @@ class ASTParser:
     
     def expression(self):
         """解析表达式"""
-        return self.equality()
-    
-    def equality(self):
-        """解析相等性表达式"""
-        node = self.comparison()
-        
-        while (self.current_token is not None and 
-               self.current_token.type == TokenType.OP and 
-               self.current_token.value in ["==", "!="]):
-            op = self.current_token.value
-            self.eat(TokenType.OP, op)
-            right = self.comparison()
-            node = BinaryOp(node, op, right)
-        
-        return node
+        return self.binary_expression(1)
     
-    def comparison(self):
-        """解析比较表达式"""
-        node = self.term()
-        
-        while (self.current_token is not None and 
-               self.current_token.type == TokenType.OP and 
-               self.current_token.value in [">", "<", ">=", "<="]):
-            op = self.current_token.value
-            self.eat(TokenType.OP, op)
-            right = self.term()
-            node = BinaryOp(node, op, right)
-        
-        return node
-    
-    def term(self):
-        """解析加减表达式"""
-        node = self.factor()
-        
-        while (self.current_token is not None and 
-               self.current_token.type == TokenType.OP and 
-               self.current_token.value in ["+", "-"]):
-            op = self.current_token.value
-            self.eat(TokenType.OP, op)
-            right = self.factor()
-            node = BinaryOp(node, op, right)
-        
-        return node
-    
-    def factor(self):
-        """解析乘除模表达式"""
+    def binary_expression(self, min_prec):
+        """按优先级爬升解析左结合的二元运算表达式，一个循环处理全部优先级"""
         node = self.primary()
+        precedence = ASTParser._PRECEDENCE
         
-        while (self.current_token is not None and 
-               self.current_token.type == TokenType.OP and 
-               self.current_token.value in ["*", "/", "%"]):
-            op = self.current_token.value
-            self.eat(TokenType.OP, op)
-            right = self.primary()
-            node = BinaryOp(node, op, right)
+        while True:
+            token = self.current_token
+            if token is None or token[0] is not TokenType.OP:
+                break
+            prec = precedence.get(token[1])
+            if prec is None or prec < min_prec:
+                break
+            op = token[1]
+            self.pos += 1
+            self.current_token = self.tokens[self.pos]
+            right = self.binary_expression(prec + 1)
+            node = fold_binary(node, op, right)
         
         return node
     
     def primary(self):
         """解析基本表达式"""
-        if self.current_token.type == TokenType.LITERAL:
-            value = self.current_token.value
+        if self.current_token[0] is TokenType.LITERAL:
+            value = self.current_token[1]
             self.eat(TokenType.LITERAL)
             # 将十六进制字符串转换为整数
             if value.startswith('0x'):
-                return Literal(int(value, 16))
+                return make_literal(int(value, 16))
             else:
-                return Literal(int(value))
-        elif self.current_token.type == TokenType.ID:
-            name = self.current_token.value
+                return make_literal(int(value))
+        elif self.current_token[0] is TokenType.ID:
+            name = self.current_token[1]
             self.eat(TokenType.ID)
             return Identifier(name)
-        elif self.current_token.type == TokenType.KEYWORD and self.current_token.value in ["read", "write", "put", "get"]:
-            name = self.current_token.value
+        elif self.current_token[0] is TokenType.KEYWORD and self.current_token[1] in ASTParser._EXPRESSION_KEYWORDS:
+            name = self.current_token[1]
             self.eat(TokenType.KEYWORD)
             return Keyword(name)
-        elif self.current_token.type == TokenType.OP and self.current_token.value == "(":
+        elif self.current_token[0] is TokenType.OP and self.current_token[1] == "(":
             self.eat(TokenType.OP, "(")
             node = self.expression()
             self.eat(TokenType.OP, ")")
@@ -266,12 +289,148 @@ class ASTParser:
         except Exception as e:
             raise e
 
+# 二元运算的求值函数：用一次字典查找代替逐个比较运算符的if链，
+# 加减乘直接使用operator模块中C实现的函数；除数为0时结果为0
+BINARY_OPS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': lambda left, right: left // right if right != 0 else 0,
+    '%': lambda left, right: left % right if right != 0 else 0,
+    '>': lambda left, right: 1 if left > right else 0,
+    '<': lambda left, right: 1 if left < right else 0,
+    '>=': lambda left, right: 1 if left >= right else 0,
+    '<=': lambda left, right: 1 if left <= right else 0,
+    '==': lambda left, right: 1 if left == right else 0,
+    '!=': lambda left, right: 1 if left != right else 0,
+}
+
+def fold_binary(left, op, right):
+    """构造二元运算节点；两侧都是常量时在解析期直接求值，返回常量节点"""
+    if left.KIND == Literal.KIND and right.KIND == Literal.KIND:
+        return make_literal(BINARY_OPS[op](left.value, right.value))
+    return BinaryOp(left, op, right)
+
+def expression_source(node, variable="_vars[{}]", keywords=None):
+    """把表达式翻译成等价的Python表达式源码，variable给出按槽位访问变量的写法；
+    keywords给出read/get等关键字的翻译，为None时遇到关键字返回None"""
+    if node.KIND == Literal.KIND:
+        return repr(node.value)
+    if node.KIND == Identifier.KIND:
+        return variable.format(node.slot)
+    if node.KIND == Keyword.KIND:
+        return None if keywords is None else keywords[node.name]
+    
+    left = expression_source(node.left, variable, keywords)
+    right = expression_source(node.right, variable, keywords)
+    if left is None or right is None:
+        return None
+    if node.op in ('+', '-', '*'):
+        return f"({left} {node.op} {right})"
+    if node.op in ('/', '%'):
+        # 除数是非零常量时直接用Python的整除和取模，否则由辅助函数处理除数为0的情况
+        if node.right.KIND == Literal.KIND and node.right.value != 0:
+            return f"({left} {'//' if node.op == '/' else '%'} {right})"
+        return f"{'_div' if node.op == '/' else '_mod'}({left}, {right})"
+    # 比较运算的结果为0或1；两侧都已加括号，不会变成Python的链式比较
+    return f"(1 if {left} {node.op} {right} else 0)"
+
+# 整个程序翻译成Python函数时关键字的写法：read/get调用输入函数，write/put作为表达式时值为0
+PROGRAM_KEYWORDS = {"read": "_read()", "get": "_get()", "write": "0", "put": "0"}
+
+def statements_source(statements, indent, lines):
+    """把语句序列翻译成Python语句，逐行追加到lines；变量是函数的局部变量v<槽位>"""
+    padding = "    " * indent
+    for statement in statements:
+        if statement.KIND == Assignment.KIND:
+            value = expression_source(statement.value, "v{}", PROGRAM_KEYWORDS)
+            target = statement.target
+            if target.KIND == Identifier.KIND:
+                lines.append(f"{padding}v{target.slot} = {value}")
+            elif target.name == "write":
+                lines.append(f"{padding}_write({value})")
+            else:
+                lines.append(f"{padding}_put({value})")
+        elif statement.KIND == IfStatement.KIND:
+            condition = expression_source(statement.condition, "v{}", PROGRAM_KEYWORDS)
+            lines.append(f"{padding}if {condition}:")
+            statements_source(statement.then_block, indent + 1, lines)
+            if statement.else_block:
+                lines.append(f"{padding}else:")
+                statements_source(statement.else_block, indent + 1, lines)
+        elif statement.KIND == WhileStatement.KIND:
+            condition = expression_source(statement.condition, "v{}", PROGRAM_KEYWORDS)
+            lines.append(f"{padding}while {condition}:")
+            statements_source(statement.body, indent + 1, lines)
+    if not statements:
+        lines.append(f"{padding}pass")
+
+def program_source(statements, variable_count):
+    """把整个程序翻译成一个Python函数的源码，变量全部是局部变量并初始化为0"""
+    lines = ["def _mandrill(_div, _mod, _read, _get, _write, _put):"]
+    for slot in range(variable_count):
+        lines.append(f"    v{slot} = 0")
+    statements_source(statements, 1, lines)
+    return "\n".join(lines) + "\n"
+
+# read的输入格式：前导空白，后跟可选负号和若干数字
+INTEGER_PATTERN = re.compile(r'(\s*)(-?\d+)?')
+
+# 编译结果的磁盘缓存目录；只有设置了环境变量MANDRILL_CACHE_DIR才启用，缓存文件由使用者自行清理
+CACHE_DIR = os.environ.get('MANDRILL_CACHE_DIR')
+
+def program_cache_path(source):
+    """按源代码计算缓存文件路径，未启用缓存或无法确定时返回None；键中还包含Python字节码版本和
+    解释器、词法分析器的实现，任何一方变化都不会读到过期的缓存"""
+    if not CACHE_DIR:
+        return None
+    key = hashlib.blake2b(importlib.util.MAGIC_NUMBER, digest_size=16)
+    try:
+        for module in (__name__, Lexer.__module__):
+            with open(sys.modules[module].__file__, 'rb') as f:
+                key.update(f.read())
+    except (OSError, AttributeError):
+        return None
+    key.update(source.encode('utf-8', 'surrogatepass'))
+    return os.path.join(CACHE_DIR, key.hexdigest() + '.pyc')
+
+def load_cached_program(path):
+    """读取缓存的程序代码，没有缓存或缓存损坏时返回None"""
+    if path is None:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+def store_cached_program(path, code):
+    """把程序代码写入缓存；先写临时文件再改名，并发运行时不会读到写了一半的文件，写入失败时忽略"""
+    if path is None:
+        return
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            marshal.dump(code, f)
+        os.replace(temp_path, path)
+    except (OSError, ValueError):
+        # 写入或改名失败时删掉残留的临时文件
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
 # 解释器
 class Interpreter:
     def __init__(self, input_file='mandrill.in'):
-        self.variables = {}  # 全局变量字典
+        self.variables = []  # 全局变量区，按名字解析得到的槽位下标访问
+        self.slots = {}      # 变量名到槽位的映射
         self.input_data = ""
         self.input_index = 0
+        self._out = bytearray()  # write/put的输出缓冲区，统一写出
+        self.program_code = None  # 整体编译得到的程序代码，无法编译时为None
+        atexit.register(self.flush_output)
         
         # 读取输入文件
         try:
@@ -280,28 +439,128 @@ class Interpreter:
         except FileNotFoundError:
             self.input_data = ""
         
-        # 缓存访问方法以提高性能
-        self.visitors = {
-            'Program': self.visit_Program,
-            'Block': self.visit_Block,
-            'Assignment': self.visit_Assignment,
-            'IfStatement': self.visit_IfStatement,
-            'WhileStatement': self.visit_WhileStatement,
-            'BinaryOp': self.visit_BinaryOp,
-            'Literal': self.visit_Literal,
-            'Identifier': self.visit_Identifier,
-            'Keyword': self.visit_Keyword,
-        }
+        # 按节点KIND为下标缓存访问方法，分发只需一次列表索引
+        self.vtable = [
+            self.visit_Program,         # Program.KIND == 0
+            self.visit_Assignment,      # Assignment.KIND == 1
+            self.visit_IfStatement,     # IfStatement.KIND == 2
+            self.visit_WhileStatement,  # WhileStatement.KIND == 3
+            self.visit_BinaryOp,        # BinaryOp.KIND == 4
+            self.visit_Literal,         # Literal.KIND == 5
+            self.visit_Identifier,      # Identifier.KIND == 6
+            self.visit_Keyword,         # Keyword.KIND == 7
+            self.generic_visit,         # ASTNode.KIND == 8
+        ]
         
     def interpret(self, ast):
         """解释执行AST"""
-        self.visit(ast)
+        self.resolve_names(ast.statements)
+        # 未赋值的变量默认为0
+        self.variables[:] = [0] * len(self.slots)
+        self.program_code = self.compile_program(ast.statements)
+        if self.program_code is not None:
+            self.run_program(self.program_code)
+            return
+        
+        # 无法整体编译时退回逐节点解释
+        self.compile_conditions(ast.statements)
+        try:
+            self.visit(ast)
+        finally:
+            # 出错时也要写出已产生的部分输出
+            self.flush_output()
+    
+    def run_program(self, code):
+        """执行compile_program编译出的程序代码"""
+        namespace = {}
+        exec(code, namespace)
+        try:
+            namespace['_mandrill'](BINARY_OPS['/'], BINARY_OPS['%'], self.read_integer, self.read_character,
+                                   self.write_integer, self.put_character)
+        finally:
+            # 出错时也要写出已产生的部分输出
+            self.flush_output()
+    
+    def flush_output(self):
+        """把缓冲的输出一次性写到标准输出"""
+        if self._out:
+            sys.stdout.flush()
+            sys.stdout.buffer.write(self._out)
+            sys.stdout.flush()
+            self._out.clear()
+    
+    def resolve_slot(self, identifier):
+        """为标识符分配变量槽位，同名变量共享一个槽位"""
+        slot = self.slots.get(identifier.name)
+        if slot is None:
+            slot = self.slots[identifier.name] = len(self.slots)
+        identifier.slot = slot
+    
+    def resolve_expression(self, expression):
+        """解析表达式中所有标识符的槽位；用显式栈遍历，深层表达式不会耗尽递归深度"""
+        pending = [expression]
+        while pending:
+            node = pending.pop()
+            if node.KIND == BinaryOp.KIND:
+                pending.append(node.right)
+                pending.append(node.left)
+            elif node.KIND == Identifier.KIND:
+                self.resolve_slot(node)
+    
+    def resolve_names(self, statements):
+        """名字解析：为语句序列中出现的每个变量名分配固定槽位"""
+        for statement in statements:
+            if statement.KIND == Assignment.KIND:
+                if statement.target.KIND == Identifier.KIND:
+                    self.resolve_slot(statement.target)
+                self.resolve_expression(statement.value)
+            elif statement.KIND == IfStatement.KIND:
+                self.resolve_expression(statement.condition)
+                self.resolve_names(statement.then_block)
+                if statement.else_block:
+                    self.resolve_names(statement.else_block)
+            elif statement.KIND == WhileStatement.KIND:
+                self.resolve_expression(statement.condition)
+                self.resolve_names(statement.body)
+    
+    def compile_program(self, statements):
+        """把整个程序编译成定义Python函数的代码对象，交给CPython执行；无法编译时返回None"""
+        try:
+            source = program_source(statements, len(self.slots))
+            return compile(source, '<mandrill>', 'exec')
+        except (RecursionError, MemoryError, SyntaxError):
+            # 表达式或嵌套过深、超出Python编译器的限制
+            return None
     
+    def compile_condition(self, condition):
+        """把条件表达式编译成无参函数，每次求值只需一次Python调用；无法编译时返回None"""
+        try:
+            source = expression_source(condition)
+            if source is None:
+                return None
+            code = compile(f"lambda _vars=_vars, _div=_div, _mod=_mod: {source}", '<mandrill>', 'eval')
+        except (RecursionError, MemoryError, SyntaxError):
+            # 表达式过深时退回逐节点解释
+            return None
+        namespace = {'_vars': self.variables, '_div': BINARY_OPS['/'], '_mod': BINARY_OPS['%']}
+        return eval(code, namespace)
+    
+    def compile_conditions(self, statements):
+        """为语句序列中所有if/while预编译条件"""
+        for statement in statements:
+            if statement.KIND == IfStatement.KIND:
+                statement.condition_func = self.compile_condition(statement.condition)
+                self.compile_conditions(statement.then_block)
+                if statement.else_block:
+                    self.compile_conditions(statement.else_block)
+            elif statement.KIND == WhileStatement.KIND:
+                statement.condition_func = self.compile_condition(statement.condition)
+                self.compile_conditions(statement.body)
+    
+    # 热点访问方法把方法表绑定为局部变量后直接按KIND分发，省去每个节点一次visit调用
     def visit(self, node):
         """访问AST节点"""
-        node_type = type(node).__name__
-        visitor = self.visitors.get(node_type, self.generic_visit)
-        return visitor(node)
+        return self.vtable[node.KIND](node)
     
     def generic_visit(self, node):
         """通用访问方法"""
@@ -309,74 +568,97 @@ class Interpreter:
     
     def visit_Program(self, node):
         """访问程序节点"""
-        for statement in node.statements:
-            self.visit(statement)
+        self.execute(node.statements)
+    
+    def execute(self, statements):
+        """用显式栈执行语句序列：if/while进入语句块时压入该块的迭代器而不是递归调用访问方法，
+        语句嵌套再深也不占用Python调用栈；只有表达式求值仍然递归"""
+        vtable = self.vtable
+        # 栈中每项是(语句块迭代器, 所属while语句)，if块和最外层的所属while为None
+        blocks = [(iter(statements), None)]
+        push = blocks.append
+        while blocks:
+            block, loop = blocks[-1]
+            for node in block:
+                kind = node.KIND
+                if kind == Assignment.KIND:
+                    vtable[kind](node)
+                    continue
+                
+                if kind == WhileStatement.KIND and node.flat:
+                    # 循环体只有赋值语句，不会再进入语句块，直接在这里循环
+                    body = node.body
+                    condition_func = node.condition_func
+                    if condition_func is None:
+                        condition = node.condition
+                        condition_func = partial(vtable[condition.KIND], condition)
+                    while condition_func() != 0:  # 零为假
+                        for statement in body:
+                            vtable[statement.KIND](statement)
+                    continue
+                
+                if self.evaluate_condition(node) != 0:  # 非零为真
+                    if kind == WhileStatement.KIND:
+                        push((iter(node.body), node))
+                    else:
+                        push((iter(node.then_block), None))
+                    break
+                if kind == IfStatement.KIND and node.else_block:
+                    push((iter(node.else_block), None))
+                    break
+            else:
+                # 语句块执行完毕；while循环体结束后重新检查条件，成立时原地换上新一轮的迭代器
+                if loop is None:
+                    blocks.pop()
+                    continue
+                if self.evaluate_condition(loop) != 0:
+                    blocks[-1] = (iter(loop.body), loop)
+                else:
+                    blocks.pop()
     
-    def visit_Block(self, node):
-        """访问块节点"""
-        for statement in node.statements:
-            self.visit(statement)
+    def evaluate_condition(self, node):
+        """求if/while语句的条件值，优先使用预编译的条件函数"""
+        condition_func = node.condition_func
+        if condition_func is not None:
+            return condition_func()
+        condition = node.condition
+        return self.vtable[condition.KIND](condition)
     
     def visit_Assignment(self, node):
         """访问赋值语句"""
-        value = self.visit(node.value)
+        value = node.value
+        value = self.vtable[value.KIND](value)
         
         if isinstance(node.target, Identifier):
             # 普通变量赋值
-            self.variables[node.target.name] = value
+            self.variables[node.target.slot] = value
         elif isinstance(node.target, Keyword):
             # 特殊关键字赋值
             if node.target.name == "write":
-                print(value, end='')  # write不添加换行符
+                self.write_integer(value)
             elif node.target.name == "put":
-                if 0 <= value <= 127:  # 有效ASCII字符
-                    print(chr(value), end='')
+                self.put_character(value)
     
     def visit_IfStatement(self, node):
         """访问if语句"""
-        condition = self.visit(node.condition)
-        if condition != 0:  # 非零为真
-            self.visit(node.then_block)
-        elif node.else_block:
-            self.visit(node.else_block)
+        self.execute((node,))
     
     def visit_WhileStatement(self, node):
         """访问while语句"""
-        while True:
-            condition = self.visit(node.condition)
-            if condition == 0:  # 零为假
-                break
-            self.visit(node.body)
+        self.execute((node,))
     
     def visit_BinaryOp(self, node):
         """访问二元操作"""
-        left = self.visit(node.left)
-        right = self.visit(node.right)
+        vtable = self.vtable
+        left = node.left
+        left = vtable[left.KIND](left)
+        right = node.right
+        right = vtable[right.KIND](right)
         
-        if node.op == '+':
-            return left + right
-        elif node.op == '-':
-            return left - right
-        elif node.op == '*':
-            return left * right
-        elif node.op == '/':
-            return left // right if right != 0 else 0
-        elif node.op == '%':
-            return left % right if right != 0 else 0
-        elif node.op == '>':
-            return 1 if left > right else 0
-        elif node.op == '<':
-            return 1 if left < right else 0
-        elif node.op == '>=':
-            return 1 if left >= right else 0
-        elif node.op == '<=':
-            return 1 if left <= right else 0
-        elif node.op == '==':
-            return 1 if left == right else 0
-        elif node.op == '!=':
-            return 1 if left != right else 0
-        else:
+        op_func = BINARY_OPS.get(node.op)
+        if op_func is None:
             raise Exception(f'Unknown binary operator: {node.op}')
+        return op_func(left, right)
     
     def visit_Literal(self, node):
         """访问字面量"""
@@ -384,7 +666,7 @@ class Interpreter:
     
     def visit_Identifier(self, node):
         """访问标识符"""
-        return self.variables.get(node.name, 0)  # 未定义变量默认为0
+        return self.variables[node.slot]
     
     def visit_Keyword(self, node):
         """访问关键字"""
@@ -398,37 +680,29 @@ class Interpreter:
         else:
             raise Exception(f'Unknown keyword: {node.name}')
     
+    def write_integer(self, value):
+        """write：输出整数，不添加换行符"""
+        self._out += str(value).encode()
+    
+    def put_character(self, value):
+        """put：输出字符，只输出有效ASCII字符"""
+        if 0 <= value <= 127:
+            self._out.append(value)
+    
     def read_integer(self):
         """读取整数，类似scanf("%d", &n)的行为"""
-        # 跳过空白字符
-        while self.input_index < len(self.input_data) and self.input_data[self.input_index].isspace():
-            self.input_index += 1
+        # 一次正则匹配完成跳过空白和读取数字（包括负号）
+        match = INTEGER_PATTERN.match(self.input_data, self.input_index)
+        number = match.group(2)
         
-        if self.input_index >= len(self.input_data):
-            return 0
-        
-        # 读取数字（包括负号）
-        num_str = ""
-        start_index = self.input_index
-        
-        # 处理负号
-        if self.input_index < len(self.input_data) and self.input_data[self.input_index] == '-':
-            num_str += self.input_data[self.input_index]
-            self.input_index += 1
-        
-        # 读取数字
-        while (self.input_index < len(self.input_data) and 
-               self.input_data[self.input_index].isdigit()):
-            num_str += self.input_data[self.input_index]
-            self.input_index += 1
-        
-        # 如果没有读取到有效数字，返回0
-        if not num_str or num_str == '-':
-            self.input_index = start_index
+        # 如果没有读取到有效数字，只跳过空白并返回0
+        if number is None:
+            self.input_index = match.end(1)
             return 0
         
+        self.input_index = match.end()
         try:
-            return int(num_str)
+            return int(number)
         except ValueError:
             return 0
     
@@ -445,6 +719,13 @@ def main():
     source = sys.stdin.read()
     
     try:
+        # 同样的源代码已经编译过时直接执行缓存的代码，跳过词法和语法分析
+        cache_path = program_cache_path(source)
+        code = load_cached_program(cache_path)
+        if code is not None:
+            Interpreter().run_program(code)
+            return
+        
         # 创建词法分析器和AST解析器
         lexer = Lexer(source)
         parser = ASTParser(lexer)
@@ -455,6 +736,8 @@ def main():
         # 创建解释器并执行
         interpreter = Interpreter()
         interpreter.interpret(ast)
+        if interpreter.program_code is not None:
+            store_cached_program(cache_path, interpreter.program_code)
         
     except Exception as e:
         # 静默处理错误，按照要求不输出错误信息
@@ -1,167 +1,101 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import re
 import sys
 
-# 定义Token类型
+# 定义Token类型（驻留字符串，解析器可以直接用is比较）
 class TokenType:
-    KEYWORD = "keyword"  # 关键字
-    ID = "id"            # 标识符
-    LITERAL = "literal"  # 常量
-    OP = "op"            # 运算符
-
-# Token类，表示词法单元
-class Token:
-    def __init__(self, token_type, value):
-        self.type = token_type
-        self.value = value
-
-    def __str__(self):
-        return f"[{self.type}:{self.value}]"
+    KEYWORD = sys.intern("keyword")  # 关键字
+    ID = sys.intern("id")            # 标识符
+    LITERAL = sys.intern("literal")  # 常量
+    OP = sys.intern("op")            # 运算符
 
 # 定义Mandrill语言的关键字
 KEYWORDS = {
     "if", "else", "while", "read", "put", "write", "get"
 }
 
-# 定义合法的单字符运算符
-SINGLE_CHAR_OPS = {
-    "+", "-", "*", "/", "%", ">", "<", "=", ";", "(", ")", "{", "}"
-}
+# 主正则：先跳过前导空白，再按优先级并列匹配各类词法单元，
+# 由C实现的正则引擎一次匹配就得到一个完整的单元
+TOKEN_PATTERN = re.compile(r"""
+    \s*                                     # 前导空白
+    (?:
+        (?P<id>[a-z]+)                      # 标识符或关键字
+      | (?P<num>[0-9]+)                     # 整数常量
+      | (?P<char>'(?:\\[n\\']|[^\\])')      # 字符常量
+      | (?P<op>>=|<=|==|!=|[-+*/%<>=;(){}]) # 运算符（双字符优先）
+    )
+""", re.VERBOSE)
 
-# 定义双字符运算符
-DOUBLE_CHAR_OPS = {
-    ">=", "<=", "==", "!="
-}
+# 空白：主正则匹配失败时用来定位结尾或出错字符
+WHITESPACE_PATTERN = re.compile(r"\s*")
+
+# 字符常量中支持的转义字符
+ESCAPES = {"n": ord("\n"), "\\": ord("\\"), "'": ord("'")}
 
 class Lexer:
     def __init__(self, source):
         self.source = source
         self.pos = 0
-        self.line = 1
-        self.column = 1
-        self.current_char = self.source[0] if source else None
 
-    def error(self, message=None):
-        """报告词法错误"""
+    def error(self, message=None, pos=None):
+        """报告词法错误，行列号只在出错时才根据位置计算"""
+        if pos is None:
+            pos = self.pos
         if message is None:
-            message = f"Invalid character: {self.current_char}"
-        raise Exception(f"Lexical error at line {self.line}, column {self.column}: {message}")
-
-    def advance(self):
-        """读取下一个字符"""
-        self.pos += 1
-        if self.pos >= len(self.source):
-            self.current_char = None
-        else:
-            self.current_char = self.source[self.pos]
-            if self.current_char == '\n':
-                self.line += 1
-                self.column = 1
-            else:
-                self.column += 1
-
-    def peek(self):
-        """查看下一个字符但不移动指针"""
-        peek_pos = self.pos + 1
-        if peek_pos >= len(self.source):
-            return None
-        return self.source[peek_pos]
-
-    def skip_whitespace(self):
-        """跳过空白字符"""
-        while self.current_char is not None and self.current_char.isspace():
-            self.advance()
-
-    def identifier(self):
-        """处理标识符和关键字"""
-        result = ""
-        while self.current_char is not None and self.current_char.isalpha() and self.current_char.islower():
-            result += self.current_char
-            self.advance()
-
-        # 检查是否是关键字
-        if result in KEYWORDS:
-            return Token(TokenType.KEYWORD, result)
-        else:
-            return Token(TokenType.ID, result)
-
-    def number(self):
-        """处理整数常量"""
-        result = ""
-        while self.current_char is not None and self.current_char.isdigit():
-            result += self.current_char
-            self.advance()
-
-        # 转换为十六进制表示
-        value = int(result)
-        hex_value = f"0x{value:x}"
-        return Token(TokenType.LITERAL, hex_value)
-
-    def character(self):
-        """处理字符常量"""
-        self.advance()  # 跳过开始的单引号
-        
-        # 处理转义字符
-        if self.current_char == '\\':
-            self.advance()
-            if self.current_char == 'n':
-                char_value = ord('\n')
-            elif self.current_char == '\\':
-                char_value = ord('\\')
-            elif self.current_char == '\'':
-                char_value = ord('\'')
-            else:
-                self.error(f"Unsupported escape sequence \\{self.current_char}")
-        else:
-            # 普通字符
-            char_value = ord(self.current_char)
-        
-        self.advance()  # 移动到字符后
-        
-        # 检查终止的单引号
-        if self.current_char != '\'':
-            self.error("Unterminated character literal")
-        
-        self.advance()  # 跳过结束的单引号
-        
-        # 返回十六进制表示的ASCII码
-        hex_value = f"0x{char_value:x}"
-        return Token(TokenType.LITERAL, hex_value)
+            message = f"Invalid character: {self.source[pos]}"
+        # 与逐字符扫描时的计数方式一致：读入换行符时行号加一、列号回到1，读到结尾后不再前进
+        pos = min(pos, len(self.source) - 1)
+        line = self.source.count("\n", 1, pos + 1) + 1
+        newline = self.source.rfind("\n", 1, pos + 1)
+        column = pos - newline + 1 if newline != -1 else pos + 1
+        raise Exception(f"Lexical error at line {line}, column {column}: {message}")
+
+    def bad_character(self, pos):
+        """在无法匹配任何模式的位置报告具体的词法错误"""
+        source = self.source
+        if source[pos] == "'":
+            if pos + 1 < len(source) and source[pos + 1] == "\\":
+                escaped = source[pos + 2] if pos + 2 < len(source) else None
+                if escaped not in ESCAPES:
+                    self.error(f"Unsupported escape sequence \\{escaped}", pos + 2)
+                self.error("Unterminated character literal", pos + 3)
+            if pos + 1 >= len(source):
+                self.error("Unterminated character literal", pos + 1)
+            self.error("Unterminated character literal", pos + 2)
+        self.error(f"Invalid character: {source[pos]}", pos)
 
     def get_next_token(self):
-        """获取下一个Token（与parser兼容的接口）"""
-        while self.current_char is not None:
-            if self.current_char.isspace():
-                self.skip_whitespace()
-                continue
-                
-            if self.current_char.isalpha() and self.current_char.islower():
-                return self.identifier()
-                
-            if self.current_char.isdigit():
-                return self.number()
-                
-            if self.current_char == '\'':
-                return self.character()
-                
-            # 检查双字符运算符
-            if self.current_char in ['>', '<', '=', '!'] and self.peek() == '=':
-                op = self.current_char + self.peek()
-                self.advance()
-                self.advance()
-                return Token(TokenType.OP, op)
-            
-            # 检查单字符运算符
-            elif self.current_char in SINGLE_CHAR_OPS:
-                op = self.current_char
-                self.advance()
-                return Token(TokenType.OP, op)
-            
-            self.error(f"Invalid character: {self.current_char}")
-            
-        # 没有更多的token了
-        return None
+        """获取下一个Token（与parser兼容的接口），Token是(类型, 值)二元组"""
+        source = self.source
+        m = TOKEN_PATTERN.match(source, self.pos)
+        if m is None:
+            # 跳过空白后已到结尾则没有更多的token了，否则是非法字符
+            self.pos = WHITESPACE_PATTERN.match(source, self.pos).end()
+            if self.pos >= len(source):
+                return None
+            self.bad_character(self.pos)
+        self.pos = m.end()
+        kind = m.lastgroup
+        text = m.group(kind)
+        if kind == "id":
+            # 检查是否是关键字
+            if text in KEYWORDS:
+                return (TokenType.KEYWORD, text)
+            # 驻留标识符名，同名变量共享同一字符串对象，符号表查找可按指针比较
+            return (TokenType.ID, sys.intern(text))
+        if kind == "num":
+            # 转换为十六进制表示
+            return (TokenType.LITERAL, f"0x{int(text):x}")
+        if kind == "char":
+            # 返回十六进制表示的ASCII码
+            if text[1] == "\\":
+                char_value = ESCAPES[text[2]]
+            else:
+                char_value = ord(text[1])
+            return (TokenType.LITERAL, f"0x{char_value:x}")
+        return (TokenType.OP, text)
 
     def tokenize(self):
         """将源代码转换为词元序列（用于直接输出）"""
@@ -170,7 +104,7 @@ class Lexer:
             token = self.get_next_token()
             if token is None:
                 break
-            tokens.append((token.type, token.value))
+            tokens.append(token)
         return tokens
 
 def main():
@@ -4,6 +4,14 @@
 import sys
 from lexer import TokenType, Lexer
 
+# 二元运算符优先级（数值越大结合越紧）
+PRECEDENCE = {
+    "==": 1, "!=": 1,
+    ">": 2, "<": 2, ">=": 2, "<=": 2,
+    "+": 3, "-": 3,
+    "*": 4, "/": 4, "%": 4,
+}
+
 # 语法分析器
 class Parser:
     def __init__(self, lexer):
@@ -11,7 +19,7 @@ class Parser:
         self.current_token = self.lexer.get_next_token()
     
     def error(self, message="Syntax error"):
-        token_info = "EOF" if self.current_token is None else f"{self.current_token.type}:{self.current_token.value}"
+        token_info = "EOF" if self.current_token is None else f"{self.current_token[0]}:{self.current_token[1]}"
         raise Exception(f"{message} at {token_info}")
     
     def eat(self, token_type, token_value=None):
@@ -19,8 +27,8 @@ class Parser:
         if self.current_token is None:
             self.error(f"Expected {token_type}" + (f":{token_value}" if token_value else ""))
             
-        if self.current_token.type == token_type:
-            if token_value is None or self.current_token.value == token_value:
+        if self.current_token[0] == token_type:
+            if token_value is None or self.current_token[1] == token_value:
                 self.current_token = self.lexer.get_next_token()
             else:
                 self.error(f"Expected {token_type}:{token_value}")
@@ -41,7 +49,7 @@ class Parser:
         self.statement()
         
         # 处理多条语句
-        while self.current_token is not None and self.current_token.type != TokenType.OP and self.current_token.value != '}':
+        while self.current_token is not None and self.current_token[0] != TokenType.OP and self.current_token[1] != '}':
             self.statement()
     
     def statement(self):
@@ -49,19 +57,19 @@ class Parser:
         if self.current_token is None:
             self.error("Unexpected end of input")
             
-        if self.current_token.type == TokenType.KEYWORD:
-            if self.current_token.value == "if":
+        if self.current_token[0] == TokenType.KEYWORD:
+            if self.current_token[1] == "if":
                 self.if_statement()
-            elif self.current_token.value == "while":
+            elif self.current_token[1] == "while":
                 self.while_statement()
-            elif self.current_token.value in ["write", "put"]:
+            elif self.current_token[1] in ["write", "put"]:
                 self.assignment_statement()
             else:
-                self.error(f"Unexpected keyword: {self.current_token.value}")
-        elif self.current_token.type == TokenType.ID:
+                self.error(f"Unexpected keyword: {self.current_token[1]}")
+        elif self.current_token[0] == TokenType.ID:
             self.assignment_statement()
         else:
-            self.error(f"Unexpected token: {self.current_token.type}:{self.current_token.value}")
+            self.error(f"Unexpected token: {self.current_token[0]}:{self.current_token[1]}")
     
     def if_statement(self):
         """解析if语句"""
@@ -74,7 +82,7 @@ class Parser:
         self.eat(TokenType.OP, "}")
         
         # else部分是可选的
-        if self.current_token is not None and self.current_token.type == TokenType.KEYWORD and self.current_token.value == "else":
+        if self.current_token is not None and self.current_token[0] == TokenType.KEYWORD and self.current_token[1] == "else":
             self.eat(TokenType.KEYWORD, "else")
             self.eat(TokenType.OP, "{")
             self.statement_list()
@@ -93,9 +101,9 @@ class Parser:
     def assignment_statement(self):
         """解析赋值语句"""
         # 左值可以是标识符或特殊关键字(write, put)
-        if self.current_token.type == TokenType.ID:
+        if self.current_token[0] == TokenType.ID:
             self.eat(TokenType.ID)
-        elif self.current_token.type == TokenType.KEYWORD and self.current_token.value in ["write", "put"]:
+        elif self.current_token[0] == TokenType.KEYWORD and self.current_token[1] in ["write", "put"]:
             self.eat(TokenType.KEYWORD)
         else:
             self.error("Expected identifier or output variable")
@@ -106,61 +114,31 @@ class Parser:
     
     def expression(self):
         """解析表达式"""
-        self.equality()
-    
-    def equality(self):
-        """解析相等性表达式"""
-        self.comparison()
-        
-        while (self.current_token is not None and 
-               self.current_token.type == TokenType.OP and 
-               self.current_token.value in ["==", "!="]):
-            op = self.current_token.value
-            self.eat(TokenType.OP, op)
-            self.comparison()
-    
-    def comparison(self):
-        """解析比较表达式"""
-        self.term()
-        
-        while (self.current_token is not None and 
-               self.current_token.type == TokenType.OP and 
-               self.current_token.value in [">", "<", ">=", "<="]):
-            op = self.current_token.value
-            self.eat(TokenType.OP, op)
-            self.term()
-    
-    def term(self):
-        """解析加减表达式"""
-        self.factor()
-        
-        while (self.current_token is not None and 
-               self.current_token.type == TokenType.OP and 
-               self.current_token.value in ["+", "-"]):
-            op = self.current_token.value
-            self.eat(TokenType.OP, op)
-            self.factor()
+        self.binary_expression(1)
     
-    def factor(self):
-        """解析乘除模表达式"""
+    def binary_expression(self, min_prec):
+        """按优先级爬升解析左结合的二元运算表达式（每层括号只需两层调用）"""
         self.primary()
         
-        while (self.current_token is not None and 
-               self.current_token.type == TokenType.OP and 
-               self.current_token.value in ["*", "/", "%"]):
-            op = self.current_token.value
-            self.eat(TokenType.OP, op)
-            self.primary()
+        while True:
+            tok = self.current_token
+            if tok is None or tok[0] is not TokenType.OP:
+                break
+            prec = PRECEDENCE.get(tok[1])
+            if prec is None or prec < min_prec:
+                break
+            self.eat(TokenType.OP, tok[1])
+            self.binary_expression(prec + 1)
     
     def primary(self):
         """解析基本表达式"""
-        if self.current_token.type == TokenType.LITERAL:
+        if self.current_token[0] == TokenType.LITERAL:
             self.eat(TokenType.LITERAL)
-        elif self.current_token.type == TokenType.ID:
+        elif self.current_token[0] == TokenType.ID:
             self.eat(TokenType.ID)
-        elif self.current_token.type == TokenType.KEYWORD and self.current_token.value in ["read", "write", "put", "get"]:
+        elif self.current_token[0] == TokenType.KEYWORD and self.current_token[1] in ["read", "write", "put", "get"]:
             self.eat(TokenType.KEYWORD)
-        elif self.current_token.type == TokenType.OP and self.current_token.value == "(":
+        elif self.current_token[0] == TokenType.OP and self.current_token[1] == "(":
             self.eat(TokenType.OP, "(")
             self.expression()
             self.eat(TokenType.OP, ")")
@@ -3,17 +3,331 @@
 
 import sys
 import struct
+import operator
+from array import array
+
+# 32位无符号整数的数组类型码
+WORD = "I" if array("I").itemsize == 4 else "L"
+
+# 输出缓冲区达到这个字节数时写出一次，长时间运行的程序也能陆续看到输出
+OUTPUT_BATCH = 1 << 16
+
+def wrap_source(name):
+    """生成把局部变量截断为32位有符号整数的源码；绝大多数值本来就在范围内，只需一次范围比较"""
+    return f"({name} if -0x80000000 <= {name} <= 0x7FFFFFFF else (({name} + 0x80000000) & 0xFFFFFFFF) - 0x80000000)"
+
+def wrap_int(value):
+    """把常量截断为32位有符号整数"""
+    return ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+# 二元运算的源码模板：(模板, 结果是否为布尔表达式, 结果是否需要截断)
+BINARY_SOURCE = {
+    0x00010001: ("{} + {}", False, False),
+    0x00010002: ("{} - {}", False, True),
+    0x00010003: ("{} * {}", False, False),
+    0x00010004: ("{} // {}", False, True),
+    0x00010005: ("{} % {}", False, True),
+    0x00010006: ("{} > {}", True, False),
+    0x00010007: ("{} < {}", True, False),
+    0x00010008: ("{} >= {}", True, False),
+    0x00010009: ("{} <= {}", True, False),
+    0x0001000A: ("{} == {}", True, False),
+    0x0001000B: ("{} != {}", True, False),
+}
+
+# 两边都是常量时翻译期求值用的运算函数，与BINARY_SOURCE按同样的运算操作数索引；
+# 除法和取模与执行时一样是向下取整，除数为0的情况在调用前已经处理
+BINARY_FUNCTIONS = {
+    0x00010001: operator.add,
+    0x00010002: operator.sub,
+    0x00010003: operator.mul,
+    0x00010004: operator.floordiv,
+    0x00010005: operator.mod,
+    0x00010006: operator.gt,
+    0x00010007: operator.lt,
+    0x00010008: operator.ge,
+    0x00010009: operator.le,
+    0x0001000A: operator.eq,
+    0x0001000B: operator.ne,
+}
+
+# 基本块入口执行到这个次数才把块编译成函数，只执行几次的代码不必付出翻译和编译的开销
+HOT_BLOCK_THRESHOLD = 64
+
+# 符号栈上的表达式嵌套超过这个深度时先存入临时变量，避免超出Python编译器的限制
+MAX_EXPRESSION_DEPTH = 16
+
+class StackValue:
+    """基本块翻译时符号栈上的值：尚未压入真实操作数栈的Python表达式"""
+    def __init__(self, source, constant=None, reads=frozenset(), is_bool=False, depth=0, atomic=False,
+                 int32=False):
+        self.source = source                    # 表达式源码
+        self.atomic = atomic                    # 是变量名或下标读取，使用时不必加括号
+        self.int32 = int32 or is_bool           # 值一定在32位有符号范围内，写变量和输出时不必再截断
+        self.constant = constant                # 编译期已知的常量值，否则为None
+        self.reads = reads                      # 延迟读取的变量下标，写这些变量前要先求值
+        self.is_bool = is_bool                  # 源码是比较表达式，作为值使用时要转换为0/1
+        self.depth = depth                      # 表达式嵌套深度
+    
+    def value_source(self):
+        """作为整数值使用时的源码（已加括号）"""
+        if self.is_bool:
+            return f"(1 if {self.source} else 0)"
+        if self.atomic or (self.constant is not None and self.constant >= 0):
+            return self.source
+        return f"({self.source})"
+    
+    def condition_source(self):
+        """作为条件使用时的源码"""
+        if self.is_bool:
+            return self.source
+        return f"{self.value_source()} != 0"
+
+class BlockCompiler:
+    """把字节码按基本块翻译成Python函数的源码，每个基本块执行完返回下一条指令的下标；
+    块内用符号栈代替真实的操作数栈，只有块结束时还留在栈上的值才会压入真实的栈"""
+    def __init__(self, vm):
+        self.vm = vm
+        # 在窥孔改写之前创建，保存原指令的副本，之后按需翻译时不受改写影响
+        self.code_op = list(vm.code_op)
+        self.code_arg = list(vm.code_arg)
+        self.count = len(vm.code_op)
+        self.var_count = len(vm.variables)
+        self.leaders = set(self.block_leaders())
+    
+    def block_leaders(self):
+        """找出所有基本块的入口：程序开头、静态可知的跳转目标和跳转之后的指令"""
+        vm = self.vm
+        code_op, code_arg, count = self.code_op, self.code_arg, self.count
+        leaders = {0} if count else set()
+        for i, opcode in enumerate(code_op):
+            if opcode == vm.JUMP:
+                leaders.add(code_arg[i])
+                leaders.add(i + 1)
+            elif opcode == vm.EVAL and code_arg[i] == vm.OP_COND_JUMP:
+                leaders.add(i + 1)
+                # 由紧挨着的两条DSTORE给出目标的条件跳转
+                if i >= 2 and code_op[i - 1] == vm.DSTORE and code_op[i - 2] == vm.DSTORE:
+                    leaders.add(code_arg[i - 2] // 8)
+                    leaders.add(code_arg[i - 1] // 8)
+        return sorted(pc for pc in leaders if pc < count)
+    
+    def function_source(self, start):
+        """生成一个基本块的顶层函数源码；用到的对象通过默认参数绑定为局部变量"""
+        lines = [f"def _block{start}(stack=stack, variables=variables, output=output, get_next_int=get_next_int, "
+                 f"get_next_char=get_next_char, flush_output=flush_output):"]
+        self.block_source(start, lines)
+        return "\n".join(lines) + "\n"
+    
+    def compile_block(self, start, namespace):
+        """编译从start开始的基本块，namespace提供默认参数绑定的对象；无法编译时返回None，这个块只用逐条分发执行"""
+        try:
+            code = compile(self.function_source(start), f'<mandrill-block-{start}>', 'exec')
+            exec(code, namespace)
+        except (RecursionError, MemoryError, SyntaxError):
+            return None
+        return namespace.pop(f"_block{start}")
+    
+    def block_source(self, start, lines):
+        """翻译从start开始的一个基本块"""
+        vm = self.vm
+        code_op, code_arg, count = self.code_op, self.code_arg, self.count
+        self.lines = lines
+        self.symbols = []
+        self.known = {}  # 块内已写过的变量：变量下标 -> 写入的值（常量或局部变量），之后读取时直接使用
+        self.temp_count = 0
+        self.pending_text = bytearray()
+        
+        pc = start
+        while True:
+            if pc >= count or (pc != start and pc in self.leaders):
+                # 顺序执行进入下一个基本块（或超出代码末尾结束）
+                self.materialize()
+                self.emit(f"return {pc}")
+                return
+            opcode, operand = code_op[pc], code_arg[pc]
+            if opcode == vm.NOP:
+                pass
+            elif opcode == vm.DSTORE:
+                self.symbols.append(StackValue(str(operand), operand))
+            elif opcode == vm.DLOAD:
+                if operand in self.known:
+                    self.symbols.append(self.known[operand])
+                elif operand < self.var_count:
+                    self.symbols.append(StackValue(f"variables[{operand}]", reads=frozenset((operand,)),
+                                                   atomic=True, int32=True))
+                else:
+                    # 越界的读取要在原来的位置报错
+                    self.symbols.append(self.temp(f"variables[{operand}]"))
+            elif opcode == vm.DWRITE:
+                value = self.pop()
+                for i, symbol in enumerate(self.symbols):
+                    if operand in symbol.reads:
+                        self.symbols[i] = self.temp(symbol.value_source(), symbol.int32)
+                if value.constant is not None:
+                    constant = wrap_int(value.constant)
+                    stored = StackValue(str(constant), constant)
+                elif value.int32 and value.source.isidentifier():
+                    stored = value
+                elif value.int32:
+                    stored = self.temp(value.value_source(), int32=True)
+                else:
+                    stored = self.temp(wrap_source(self.name_of(value)), int32=True)
+                self.emit(f"variables[{operand}] = {stored.source}")
+                self.known[operand] = stored
+            elif opcode == vm.EVAL:
+                if operand == vm.OP_COND_JUMP:
+                    else_value = self.pop()
+                    then_value = self.pop()
+                    condition = self.pop()
+                    self.materialize()
+                    self.emit(f"return {self.target_source(then_value)} if {condition.condition_source()} "
+                              f"else {self.target_source(else_value)}")
+                    return
+                if not self.binary(operand):
+                    return
+            elif opcode == vm.JUMP:
+                self.materialize()
+                self.emit(f"return {operand}")
+                return
+            elif opcode == vm.GETI:
+                self.symbols.append(self.temp("get_next_int()"))
+            elif opcode == vm.GETC:
+                self.symbols.append(self.temp("get_next_char()", int32=True))
+            elif opcode == vm.PUTI:
+                value = self.pop()
+                if value.constant is not None:
+                    self.pending_text += str(wrap_int(value.constant)).encode()
+                elif value.int32:
+                    self.emit(f"output.extend(str({value.value_source()}).encode())")
+                    self.emit_flush_check()
+                else:
+                    self.emit(f"output.extend(str({wrap_source(self.name_of(value))}).encode())")
+                    self.emit_flush_check()
+            elif opcode == vm.PUTC:
+                value = self.pop()
+                if value.constant is not None:
+                    code = wrap_int(value.constant)
+                    if 0 <= code <= 127:
+                        self.pending_text.append(code)
+                else:
+                    if value.int32:
+                        code = self.name_of(value)
+                    else:
+                        code = self.temp(wrap_source(self.name_of(value))).source
+                    self.emit(f"if 0 <= {code} <= 127:")
+                    self.emit(f"    output.append({code})")
+                    self.emit(f"    if len(output) >= {OUTPUT_BATCH}:")
+                    self.emit(f"        flush_output()")
+            else:
+                # INVALID：操作数是原操作码
+                self.emit(f"raise Exception({'Unknown opcode: {}'.format(operand)!r})")
+                return
+            pc += 1
+    
+    def binary(self, operand):
+        """翻译二元运算，返回False表示块在这里必然抛出异常而结束"""
+        right = self.pop()
+        left = self.pop()
+        template = BINARY_SOURCE.get(operand)
+        if template is None:
+            self.emit(f"raise Exception({'Unknown eval operand: {}'.format(operand)!r})")
+            return False
+        template, is_bool, wraps = template
+        if operand in (self.vm.OP_DIV, self.vm.OP_MOD):
+            if right.constant == 0:
+                self.emit("raise Exception('Division by zero')")
+                return False
+            if right.constant is None:
+                right = self.temp(right.value_source())
+                self.emit(f"if {right.source} == 0:")
+                self.emit("    raise Exception('Division by zero')")
+        if left.constant is not None and right.constant is not None:
+            # 两边都是常量时在翻译期直接求值
+            value = int(BINARY_FUNCTIONS[operand](left.constant, right.constant))
+            if wraps:
+                value = wrap_int(value)
+            self.symbols.append(StackValue(str(value), value))
+            return True
+        source = template.format(left.value_source(), right.value_source())
+        if wraps:
+            # 截断时结果要用到多次，先存入临时变量
+            result = StackValue(wrap_source(self.temp(source).source), int32=True)
+        else:
+            result = StackValue(source, reads=left.reads | right.reads,
+                                is_bool=is_bool, depth=max(left.depth, right.depth) + 1)
+        if result.depth > MAX_EXPRESSION_DEPTH:
+            result = self.temp(result.value_source())
+        self.symbols.append(result)
+        return True
+    
+    def target_source(self, value):
+        """条件跳转目标（字节地址）换算成指令下标的源码"""
+        if value.constant is not None:
+            return str(value.constant // 8)
+        return f"{value.value_source()} // 8"
+    
+    def pop(self):
+        """弹出符号栈顶；符号栈为空时从真实的操作数栈弹出"""
+        if self.symbols:
+            return self.symbols.pop()
+        value = self.temp("stack[-1]")
+        self.emit("del stack[-1]")
+        return value
+    
+    def name_of(self, value):
+        """返回保存该值的局部变量名，不是局部变量时先存入临时变量"""
+        if value.source.isidentifier():
+            return value.source
+        return self.temp(value.value_source()).source
+    
+    def temp(self, source, int32=False):
+        """把表达式立即求值存入临时变量"""
+        name = f"t{self.temp_count}"
+        self.temp_count += 1
+        self.emit(f"{name} = {source}")
+        return StackValue(name, atomic=True, int32=int32)
+    
+    def materialize(self):
+        """块结束前把符号栈上剩余的值按顺序压入真实的操作数栈"""
+        if self.symbols:
+            values = ", ".join(symbol.value_source() for symbol in self.symbols)
+            self.emit(f"stack.extend(({values},))")
+            self.symbols = []
+        self.flush_text()
+    
+    def emit(self, line):
+        """输出一行源码；之前攒下的常量输出要先写出，保持输出和其他副作用的顺序"""
+        if self.pending_text:
+            self.flush_text()
+        self.lines.append("    " + line)
+    
+    def flush_text(self):
+        """写出翻译期已知的常量输出"""
+        if self.pending_text:
+            text = bytes(self.pending_text)
+            self.pending_text = bytearray()
+            self.lines.append(f"    output.extend({text!r})")
+            self.emit_flush_check()
+    
+    def emit_flush_check(self):
+        self.lines.append(f"    if len(output) >= {OUTPUT_BATCH}:")
+        self.lines.append("        flush_output()")
 
 class MandrillVM:
     def __init__(self):
         self.stack = []         # 操作数栈
         self.variables = []     # 变量存储区
-        self.code = []          # 代码存储区
+        self.code_op = []       # 代码存储区：操作码
+        self.code_arg = []      # 代码存储区：操作数，与操作码按下标对应
         self.pc = 0             # 程序计数器
-        self.input_tokens = []  # 输入token缓存
+        self.input_ints = []    # 预先解析好的输入整数
         self.input_pos = 0      # 输入位置
-        self.input_chars = ""   # 原始字符输入
+        self.input_codes = array(WORD)  # 原始输入的逐字符码点
         self.char_pos = 0       # 字符位置
+        self.output = bytearray()  # 输出缓冲区，攒够一批再写到标准输出
+        self.block_compiler = None  # 把热点基本块编译成Python函数
+        self.string_pool = []   # PRINT_STR指令输出的常量字符串
         
         # 指令操作码 - 作为类常量以避免属性查找
         self.NOP = 0x00000000
@@ -27,6 +341,19 @@ class MandrillVM:
         self.PUTI = 0x00000009
         self.PUTC = 0x0000000A
         
+        # 内部操作码，只在加载时生成，不会出现在字节码文件中
+        # 未定义的操作码在加载时改写为INVALID，操作数保存原操作码，执行到时报错
+        self.INVALID = 0x0000000F
+        # 超级指令：把常见的指令序列合并为一次分发，被合并的后续指令原样保留，
+        # 跳转到序列中间时仍按原指令执行
+        self.FUSED_STORE_CONST = 0x00000010      # DSTORE k; DWRITE x
+        self.FUSED_LOAD_CONST_EVAL = 0x00000011  # DLOAD x; DSTORE k; EVAL op
+        self.FUSED_BRANCH = 0x00000012           # DSTORE then; DSTORE else; EVAL COND_JUMP
+        self.PRINT_STR = 0x00000013              # (DSTORE c; PUTC)+，c为0~127的ASCII码
+        # EVAL按运算改写成的专用操作码：EVAL_BASE + (运算 & 0xFF) - 1，只需一次分发；
+        # 运算的低字节从1（ADD）到0x0C（COND_JUMP），占用0x14~0x1F，排在其他操作码之后
+        self.EVAL_BASE = 0x00000014
+        
         # eval指令操作数
         self.OP_ADD = 0x00010001
         self.OP_SUB = 0x00010002
@@ -41,72 +368,62 @@ class MandrillVM:
         self.OP_NE = 0x0001000B
         self.OP_COND_JUMP = 0x0001000C
         
-        # 预计算的常量
-        self.INT32_MIN = -2147483648
-        self.INT32_MAX = 2147483647
-        self.UINT32_MAX = 4294967296
-        
         # 预读输入
         self._preload_input()
     
     def _preload_input(self):
-        """预读所有输入并分割为tokens"""
+        """预读所有输入：整数一次性解析好，字符一次性转换为码点"""
         try:
-            # 读取所有输入
-            all_input = sys.stdin.read()
-            # 为整数输入按空白字符分割
-            self.input_tokens = all_input.split()
-            # 为字符输入保存原始字符串
-            self.input_chars = all_input
+            # 读取所有输入；进程启动时标准输入已关闭则sys.stdin为None
+            all_input = sys.stdin.read() if sys.stdin is not None else ""
+            # 为整数输入按空白字符分割，一次性解析全部整数
+            input_ints = []
+            for token in all_input.split():
+                try:
+                    input_ints.append(int(token))
+                except ValueError:
+                    continue  # 跳过非数字token
+            self.input_ints = input_ints
+            # 为字符输入按本机字节序编码成UTF-32，数组中每一项就是一个字符的码点
+            encoding = "utf-32-le" if sys.byteorder == "little" else "utf-32-be"
+            self.input_codes = array(WORD, all_input.encode(encoding, "surrogatepass"))
             self.char_pos = 0
-        except:
-            self.input_tokens = []
-            self.input_chars = ""
+        except (OSError, ValueError):
+            # 标准输入不可读（已关闭或无法解码）时按没有输入处理
+            self.input_ints = []
+            self.input_codes = array(WORD)
             self.char_pos = 0
     
     def _get_next_int(self):
         """获取下一个整数"""
-        while self.input_pos < len(self.input_tokens):
-            token = self.input_tokens[self.input_pos]
+        if self.input_pos < len(self.input_ints):
+            value = self.input_ints[self.input_pos]
             self.input_pos += 1
-            try:
-                return int(token)
-            except ValueError:
-                continue  # 跳过非数字token
+            return value
         return 0  # 没有更多输入时返回0
     
     def _get_next_char(self):
         """获取下一个字符"""
-        if self.char_pos < len(self.input_chars):
-            char = self.input_chars[self.char_pos]
+        if self.char_pos < len(self.input_codes):
+            code = self.input_codes[self.char_pos]
             self.char_pos += 1
-            return ord(char)
+            return code
         return 0
     
-    def _to_32bit_int(self, value):
-        """将值转换为32位有符号整数（模拟整数溢出）"""
-        # 使用预计算的常量，避免重复计算
-        if self.INT32_MIN <= value <= self.INT32_MAX:
-            return value
-        # 简化的模运算
-        return ((value + self.INT32_MAX + 1) % self.UINT32_MAX) + self.INT32_MIN
-    
     def load_bytecode(self, filename):
         """加载字节码文件"""
         with open(filename, 'rb') as f:
-            # 读取文件头
-            magic = f.read(16)
-            if magic != b"MANDRILLBYTECODE":
+            # 一次读入并解析整个文件头（魔数、版本、数据区大小、代码区大小、填充）
+            header = f.read(32)
+            if header[:16] != b"MANDRILLBYTECODE":
                 raise Exception("Invalid bytecode file: wrong magic number")
-            
-            version = struct.unpack(">I", f.read(4))[0]
+            # 填充可以缺失
+            if len(header) < 28:
+                raise Exception("Invalid bytecode file: truncated header")
+            version, data_size, code_size = struct.unpack_from(">III", header, 16)
             if version != 1:
                 raise Exception("Unsupported bytecode version: {}".format(version))
             
-            data_size = struct.unpack(">I", f.read(4))[0]
-            code_size = struct.unpack(">I", f.read(4))[0]
-            padding = f.read(4)  # 跳过填充
-            
             # 初始化变量存储区
             var_count = data_size // 4
             self.variables = [0] * var_count
@@ -120,221 +437,369 @@ class MandrillVM:
             # 读取代码区
             code_bytes = f.read(code_size)
             instruction_count = code_size // 8
-            self.code = [None] * instruction_count  # 预分配代码数组
+            if len(code_bytes) < instruction_count * 8:
+                raise Exception("Invalid bytecode file: truncated code area")
+            
+            # 一次性把大端的(操作码, 操作数)序列读入数组，再拆成操作码和操作数两个列表
+            words = array(WORD, code_bytes[:instruction_count * 8])
+            if sys.byteorder == "little":
+                words.byteswap()
+            self.code_op = words[0::2].tolist()
+            self.code_arg = words[1::2].tolist()
+            
+            valid_opcodes = {self.NOP, self.DSTORE, self.DLOAD, self.DWRITE, self.EVAL,
+                             self.JUMP, self.GETI, self.GETC, self.PUTI, self.PUTC}
+            code_op = self.code_op
+            code_arg = self.code_arg
+            JUMP = self.JUMP
+            for i, opcode in enumerate(code_op):
+                if opcode not in valid_opcodes:
+                    code_op[i] = self.INVALID
+                    code_arg[i] = opcode
+                elif opcode == JUMP:
+                    # 跳转目标预先换算成指令下标，结束标记换算成代码长度
+                    target = code_arg[i]
+                    code_arg[i] = instruction_count if target == 0xFFFFFFFF else target // 8
             
-            for i in range(instruction_count):
-                offset = i * 8
-                opcode, operand = struct.unpack(">II", code_bytes[offset:offset+8])
-                self.code[i] = (opcode, operand)
+            # 先记下原指令和基本块入口，再做窥孔改写；基本块在执行时按原指令翻译
+            self.block_compiler = BlockCompiler(self)
+            self._fuse_instructions()
+    
+    def _fuse_instructions(self):
+        """窥孔优化：把常见指令序列的第一条改写为超级指令"""
+        code_op = self.code_op
+        code_arg = self.code_arg
+        count = len(code_op)
+        DSTORE, DLOAD, DWRITE, EVAL = self.DSTORE, self.DLOAD, self.DWRITE, self.EVAL
+        OP_COND_JUMP = self.OP_COND_JUMP
+        PUTC = self.PUTC
+        string_pool = self.string_pool = []
+        
+        # 只看后面尚未改写的原指令，改写当前位置不影响后续匹配
+        i = 0
+        while i < count - 1:
+            first = code_op[i]
+            if first == DSTORE and code_op[i + 1] == PUTC and 0 <= code_arg[i] <= 127:
+                # 连续输出常量字符：收集成一个字符串，整段只需一次分发
+                end = i
+                while end < count - 1 and code_op[end] == DSTORE and code_op[end + 1] == PUTC \
+                        and 0 <= code_arg[end] <= 127:
+                    end += 2
+                string_pool.append(bytes(code_arg[i:end:2]))
+                code_op[i] = self.PRINT_STR
+                code_arg[i] = len(string_pool) - 1
+                i = end
+                continue
+            second = code_op[i + 1]
+            third = code_op[i + 2] if i + 2 < count else None
+            third_is_cond_jump = third == EVAL and code_arg[i + 2] == OP_COND_JUMP
+            if first == DSTORE and second == DSTORE and third_is_cond_jump:
+                # 两个分支目标预先换算成指令下标；第二条DSTORE保持原样，跳到它时仍按原指令执行
+                code_op[i] = self.FUSED_BRANCH
+                code_arg[i] = (code_arg[i] // 8, code_arg[i + 1] // 8)
+            elif first == DLOAD and second == DSTORE and third == EVAL and not third_is_cond_jump:
+                code_op[i] = self.FUSED_LOAD_CONST_EVAL
+            elif first == DSTORE and second == DWRITE:
+                code_op[i] = self.FUSED_STORE_CONST
+            i += 1
+        
+        # 已知运算的EVAL改写成专用操作码，操作数保持不变；未知运算仍由EVAL在执行时报错
+        EVAL_BASE = self.EVAL_BASE
+        for i, opcode in enumerate(code_op):
+            if opcode == EVAL and self.OP_ADD <= code_arg[i] <= OP_COND_JUMP:
+                code_op[i] = EVAL_BASE + (code_arg[i] & 0xFF) - 1
     
     def run(self):
         """执行虚拟机 - 进一步优化版本"""
-        self.pc = 0
         stack = self.stack  # 本地引用以减少属性查找
         variables = self.variables
-        code = self.code
+        code_op = self.code_op
+        code_arg = self.code_arg
+        code_length = len(code_op)
+        output = self.output
+        
+        # 操作码常量和辅助方法也绑定为局部变量，处理函数通过闭包访问，省去属性查找
+        NOP, DSTORE, DLOAD, DWRITE, EVAL = self.NOP, self.DSTORE, self.DLOAD, self.DWRITE, self.EVAL
+        JUMP, GETI, GETC, PUTI, PUTC = self.JUMP, self.GETI, self.GETC, self.PUTI, self.PUTC
+        FUSED_STORE_CONST = self.FUSED_STORE_CONST
+        FUSED_LOAD_CONST_EVAL = self.FUSED_LOAD_CONST_EVAL
+        FUSED_BRANCH = self.FUSED_BRANCH
+        PRINT_STR = self.PRINT_STR
+        OP_COND_JUMP = self.OP_COND_JUMP
+        string_pool = self.string_pool
+        execute_eval = self.execute_eval_optimized
+        get_next_int = self._get_next_int
+        get_next_char = self._get_next_char
+        flush_output = self.flush_output
         
         # 预先创建指令处理函数映射，避免大量if-elif
-        def handle_nop(operand): pass
+        # 每个处理函数接收当前pc和操作数，返回下一条指令的pc
+        def handle_nop(pc, operand):
+            return pc + 1
         
-        def handle_dstore(operand): 
+        def handle_dstore(pc, operand):
             stack.append(operand)
+            return pc + 1
         
-        def handle_dload(operand): 
+        def handle_dload(pc, operand):
             stack.append(variables[operand])
+            return pc + 1
         
-        def handle_dwrite(operand):
+        def handle_dwrite(pc, operand):
             value = stack[-1]
             del stack[-1]
-            variables[operand] = self._to_32bit_int(value)
+            if not -0x80000000 <= value <= 0x7FFFFFFF:
+                value = ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+            variables[operand] = value
+            return pc + 1
         
-        def handle_eval(operand):
-            self.execute_eval_optimized(operand, stack)
+        def handle_eval(pc, operand):
+            # 已知运算在加载时都改写成了专用操作码，到这里的只有未知运算，由execute_eval照常报错
+            execute_eval(operand, stack)
+            return pc + 1
         
-        def handle_jump(operand):
-            if operand == 0xFFFFFFFF:
-                return True  # 程序结束标志
-            self.pc = operand // 8 - 1  # -1因为主循环会+1
-            return False
+        def handle_jump(pc, operand):
+            # 目标在加载时已换算为指令下标（结束标记为代码长度）
+            return operand
         
-        def handle_geti(operand):
-            stack.append(self._get_next_int())
+        def handle_geti(pc, operand):
+            stack.append(get_next_int())
+            return pc + 1
         
-        def handle_getc(operand):
-            stack.append(self._get_next_char())
+        def handle_getc(pc, operand):
+            stack.append(get_next_char())
+            return pc + 1
         
-        def handle_puti(operand):
+        def handle_puti(pc, operand):
             value = stack[-1]
             del stack[-1]
-            print(self._to_32bit_int(value), end='')
+            if not -0x80000000 <= value <= 0x7FFFFFFF:
+                value = ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+            output.extend(str(value).encode())
+            if len(output) >= OUTPUT_BATCH:
+                flush_output()
+            return pc + 1
         
-        def handle_putc(operand):
+        def handle_putc(pc, operand):
             value = stack[-1]
             del stack[-1]
-            value = self._to_32bit_int(value)
+            if not -0x80000000 <= value <= 0x7FFFFFFF:
+                value = ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
             if 0 <= value <= 127:
-                print(chr(value), end='')
-        
-        # 指令分发表
-        instruction_handlers = {
-            self.NOP: handle_nop,
-            self.DSTORE: handle_dstore,
-            self.DLOAD: handle_dload,
-            self.DWRITE: handle_dwrite,
-            self.EVAL: handle_eval,
-            self.JUMP: handle_jump,
-            self.GETI: handle_geti,
-            self.GETC: handle_getc,
-            self.PUTI: handle_puti,
-            self.PUTC: handle_putc,
-        }
-        
-        # 主执行循环
-        while self.pc < len(code):
-            opcode, operand = code[self.pc]
-            
-            handler = instruction_handlers.get(opcode)
-            if handler:
-                if opcode == self.JUMP:
-                    if handler(operand):  # 程序结束
-                        break
-                else:
-                    handler(operand)
-            else:
-                raise Exception("Unknown opcode: {}".format(opcode))
-            
-            self.pc += 1
-    
-    def execute_eval_optimized(self, operand, stack):
-        """进一步优化的eval指令执行"""
-        if operand == self.OP_COND_JUMP:
-            # 条件跳转：使用索引访问而不是pop()
-            else_addr = stack[-1]
-            then_addr = stack[-2]
-            condition = stack[-3]
-            del stack[-3:]  # 一次性删除3个元素
-            
+                output.append(value)
+                if len(output) >= OUTPUT_BATCH:
+                    flush_output()
+            return pc + 1
+        
+        def handle_invalid(pc, operand):
+            # 操作数是加载时保存的原操作码
+            raise Exception("Unknown opcode: {}".format(operand))
+        
+        def handle_store_const(pc, operand):
+            # DSTORE k; DWRITE x
+            # 操作数是无符号的32位常量，超过有符号范围时减去2^32即可
+            variables[code_arg[pc + 1]] = operand if operand <= 0x7FFFFFFF else operand - 0x100000000
+            return pc + 2
+        
+        def handle_load_const_eval(pc, operand):
+            # DLOAD x; DSTORE k; EVAL op：EVAL已改写为专用操作码，直接交给它的处理函数
+            stack.append(variables[operand])
+            stack.append(code_arg[pc + 1])
+            return instruction_handlers[code_op[pc + 2]](pc + 2, code_arg[pc + 2])
+        
+        def handle_branch(pc, operand):
+            # DSTORE then; DSTORE else; EVAL COND_JUMP：条件已在栈顶
+            condition = stack[-1]
+            del stack[-1]
+            # 操作数是加载时换算好的(then下标, else下标)
             if condition != 0:
-                self.pc = then_addr // 8
-            else:
-                self.pc = else_addr // 8
-            self.pc -= 1  # 因为主循环会+1
-            return
+                return operand[0]
+            return operand[1]
         
-        # 二元运算：使用索引访问
-        right = stack[-1]
-        left = stack[-2]
-        del stack[-2:]  # 一次性删除2个元素
-        
-        # 使用优化的分支结构减少比较次数
-        if operand == self.OP_MUL:
-            # 针对布尔乘法的特殊优化
-            if left == 0 or right == 0:
-                result = 0
-            elif left == 1:
-                result = right
-            elif right == 1:
-                result = left
-            else:
-                result = left * right
-        elif operand == self.OP_ADD:
-            result = left + right
-        elif operand == self.OP_SUB:
-            result = self._to_32bit_int(left - right)
-        elif operand == self.OP_DIV:
+        # 各运算的专用处理函数：先按索引读出两个操作数（栈不足时在这里报错），再覆盖栈顶
+        def handle_add(pc, operand):
+            right = stack[-1]
+            left = stack[-2]
+            del stack[-1]
+            stack[-1] = left + right
+            return pc + 1
+        
+        def handle_sub(pc, operand):
+            right = stack[-1]
+            left = stack[-2]
+            result = left - right
+            if not -0x80000000 <= result <= 0x7FFFFFFF:
+                result = ((result + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+            del stack[-1]
+            stack[-1] = result
+            return pc + 1
+        
+        def handle_mul(pc, operand):
+            right = stack[-1]
+            left = stack[-2]
+            del stack[-1]
+            stack[-1] = left * right
+            return pc + 1
+        
+        def handle_div(pc, operand):
+            right = stack[-1]
+            left = stack[-2]
             if right == 0:
                 raise Exception("Division by zero")
-            result = self._to_32bit_int(left // right)
-        elif operand == self.OP_MOD:
+            result = left // right
+            if not -0x80000000 <= result <= 0x7FFFFFFF:
+                result = ((result + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+            del stack[-1]
+            stack[-1] = result
+            return pc + 1
+        
+        def handle_mod(pc, operand):
+            right = stack[-1]
+            left = stack[-2]
             if right == 0:
                 raise Exception("Division by zero")
-            mod_result = left % right
-            if right > 0 and mod_result < 0:
-                mod_result += right
-            result = self._to_32bit_int(mod_result)
-        # 使用连续的比较操作减少分支预测失败
-        elif operand == self.OP_EQ:
-            result = 1 if left == right else 0
-        elif operand == self.OP_NE:
-            result = 1 if left != right else 0
-        elif operand == self.OP_GT:
-            result = 1 if left > right else 0
-        elif operand == self.OP_LT:
-            result = 1 if left < right else 0
-        elif operand == self.OP_GE:
-            result = 1 if left >= right else 0
-        elif operand == self.OP_LE:
-            result = 1 if left <= right else 0
-        else:
-            raise Exception("Unknown eval operand: {}".format(operand))
+            result = left % right
+            if not -0x80000000 <= result <= 0x7FFFFFFF:
+                result = ((result + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+            del stack[-1]
+            stack[-1] = result
+            return pc + 1
+        
+        def handle_gt(pc, operand):
+            right = stack[-1]
+            left = stack[-2]
+            del stack[-1]
+            stack[-1] = 1 if left > right else 0
+            return pc + 1
+        
+        def handle_lt(pc, operand):
+            right = stack[-1]
+            left = stack[-2]
+            del stack[-1]
+            stack[-1] = 1 if left < right else 0
+            return pc + 1
+        
+        def handle_ge(pc, operand):
+            right = stack[-1]
+            left = stack[-2]
+            del stack[-1]
+            stack[-1] = 1 if left >= right else 0
+            return pc + 1
+        
+        def handle_le(pc, operand):
+            right = stack[-1]
+            left = stack[-2]
+            del stack[-1]
+            stack[-1] = 1 if left <= right else 0
+            return pc + 1
+        
+        def handle_eq(pc, operand):
+            right = stack[-1]
+            left = stack[-2]
+            del stack[-1]
+            stack[-1] = 1 if left == right else 0
+            return pc + 1
+        
+        def handle_ne(pc, operand):
+            right = stack[-1]
+            left = stack[-2]
+            del stack[-1]
+            stack[-1] = 1 if left != right else 0
+            return pc + 1
+        
+        def handle_cond_jump(pc, operand):
+            else_addr = stack[-1]
+            then_addr = stack[-2]
+            condition = stack[-3]
+            del stack[-3:]
+            return then_addr // 8 if condition != 0 else else_addr // 8
+        
+        def handle_print_str(pc, operand):
+            # 一次写出整段常量字符，跳过被合并的DSTORE/PUTC
+            text = string_pool[operand]
+            output.extend(text)
+            if len(output) >= OUTPUT_BATCH:
+                flush_output()
+            return pc + 2 * len(text)
+        
+        # 指令分发表：操作码是小整数，直接用列表下标分发，省去字典查找；
+        # 未定义的操作码在加载时已改写为INVALID
+        instruction_handlers = [handle_invalid] * 32
+        instruction_handlers[NOP] = handle_nop
+        instruction_handlers[DSTORE] = handle_dstore
+        instruction_handlers[DLOAD] = handle_dload
+        instruction_handlers[DWRITE] = handle_dwrite
+        instruction_handlers[EVAL] = handle_eval
+        instruction_handlers[JUMP] = handle_jump
+        instruction_handlers[GETI] = handle_geti
+        instruction_handlers[GETC] = handle_getc
+        instruction_handlers[PUTI] = handle_puti
+        instruction_handlers[PUTC] = handle_putc
+        instruction_handlers[FUSED_STORE_CONST] = handle_store_const
+        instruction_handlers[FUSED_LOAD_CONST_EVAL] = handle_load_const_eval
+        instruction_handlers[FUSED_BRANCH] = handle_branch
+        instruction_handlers[PRINT_STR] = handle_print_str
+        for op, handler in ((self.OP_ADD, handle_add), (self.OP_SUB, handle_sub),
+                            (self.OP_MUL, handle_mul), (self.OP_DIV, handle_div),
+                            (self.OP_MOD, handle_mod), (self.OP_GT, handle_gt),
+                            (self.OP_LT, handle_lt), (self.OP_GE, handle_ge),
+                            (self.OP_LE, handle_le), (self.OP_EQ, handle_eq),
+                            (self.OP_NE, handle_ne), (OP_COND_JUMP, handle_cond_jump)):
+            instruction_handlers[self.EVAL_BASE + (op & 0xFF) - 1] = handler
+        
+        # 基本块入口先逐条分发，执行HOT_BLOCK_THRESHOLD次后编译成函数，之后直接调用；
+        # 跳到块中间（目标在运行时才算出的跳转）时始终逐条分发
+        blocks = [None] * code_length
+        block_compiler = self.block_compiler
+        namespace = {"stack": stack, "variables": variables, "output": output, "get_next_int": get_next_int,
+                     "get_next_char": get_next_char, "flush_output": flush_output}
+        
+        def make_counter(start):
+            """生成基本块入口的计数函数：次数不够时只执行入口这一条指令"""
+            count = 0
+            def count_entry():
+                nonlocal count
+                count += 1
+                if count >= HOT_BLOCK_THRESHOLD:
+                    block = blocks[start] = block_compiler.compile_block(start, namespace)
+                    if block is not None:
+                        return block()
+                return instruction_handlers[code_op[start]](start, code_arg[start])
+            return count_entry
+        
+        if block_compiler is not None:
+            for start in block_compiler.leaders:
+                blocks[start] = make_counter(start)
         
-        stack.append(result)
+        # 主执行循环：pc是局部变量，只在退出时写回self.pc
+        pc = 0
+        try:
+            while pc < code_length:
+                # 负的pc按原来的语义从代码末尾倒数，只能逐条执行
+                block = blocks[pc] if pc >= 0 else None
+                if block is not None:
+                    pc = block()
+                else:
+                    pc = instruction_handlers[code_op[pc]](pc, code_arg[pc])
+        finally:
+            self.pc = pc
+            # 出错时也先写出已产生的输出，再由main报告错误
+            flush_output()
     
-    # 保留原来的execute_eval方法作为备用
-    def execute_eval(self, operand):
-        """执行eval指令"""
-        if operand == self.OP_COND_JUMP:
-            # 条件跳转：弹出3个值，注意弹出顺序
-            if len(self.stack) < 3:
-                raise Exception("Stack underflow in conditional jump")
-            else_addr = self.stack.pop()  # 最后压入的是else地址  
-            then_addr = self.stack.pop()  # 然后是then地址
-            condition = self.stack.pop()  # 最先压入的是条件
-            
-            if condition != 0:
-                self.pc = then_addr // 8
-            else:
-                self.pc = else_addr // 8
-            self.pc -= 1  # 因为主循环会+1
-        else:
-            # 二元运算：弹出2个值
-            if len(self.stack) < 2:
-                raise Exception("Stack underflow in binary operation")
-            right = self.stack.pop()
-            left = self.stack.pop()
-            
-            if operand == self.OP_ADD:
-                # 保持加法的完整精度，用于可能的后续模运算
-                result = left + right
-            elif operand == self.OP_SUB:
-                result = self._to_32bit_int(left - right)
-            elif operand == self.OP_MUL:
-                # 不要立即截断乘法结果，保持完整精度用于可能的模运算
-                result = left * right
-            elif operand == self.OP_DIV:
-                if right == 0:
-                    raise Exception("Division by zero")
-                result = self._to_32bit_int(left // right)
-            elif operand == self.OP_MOD:
-                if right == 0:
-                    raise Exception("Division by zero")
-                # 执行模运算后再截断
-                mod_result = left % right
-                # 确保模运算结果为正数（当除数为正时）
-                if right > 0 and mod_result < 0:
-                    mod_result += right
-                result = self._to_32bit_int(mod_result)
-            elif operand == self.OP_GT:
-                result = 1 if left > right else 0
-            elif operand == self.OP_LT:
-                result = 1 if left < right else 0
-            elif operand == self.OP_GE:
-                result = 1 if left >= right else 0
-            elif operand == self.OP_LE:
-                result = 1 if left <= right else 0
-            elif operand == self.OP_EQ:
-                result = 1 if left == right else 0
-            elif operand == self.OP_NE:
-                result = 1 if left != right else 0
-            else:
-                raise Exception("Unknown eval operand: {}".format(operand))
-            
-            # 对于可能参与后续模运算的操作，保持完整精度
-            # 只有比较运算才需要立即转换为32位
-            if operand in [self.OP_GT, self.OP_LT, self.OP_GE, self.OP_LE, self.OP_EQ, self.OP_NE]:
-                self.stack.append(result)  # 比较结果总是0或1，不需要转换
-            else:
-                self.stack.append(result)  # 保持完整精度
+    def flush_output(self):
+        """把缓冲的输出写到标准输出"""
+        if self.output:
+            sys.stdout.flush()
+            sys.stdout.buffer.write(self.output)
+            sys.stdout.flush()
+            self.output.clear()
+    
+    def execute_eval_optimized(self, operand, stack):
+        """执行未知运算的eval指令：已知运算在加载时都已改写成专用操作码，到这里只需报错"""
+        # 与其他运算一样先读出两个操作数，栈中不足两个值时照常报IndexError
+        right = stack[-1]
+        left = stack[-2]
+        raise Exception("Unknown eval operand: {}".format(operand))
 
 def main():
     if len(sys.argv) != 2: